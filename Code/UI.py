@@ -4,16 +4,59 @@ Resistance & Voltage Checker (Blue/White UI)
 - Right panel fixed width (so big left canvas has more room)
 - Limits section shows Min/Max derived from Set ± Tol
 - Active column is centered color block (Label)
+- Cell table is virtualized: only a screenful of row widgets, recycled on scroll;
+  Setting → Cell Table "Drawn grid" draws it on one Canvas instead (no widgets per cell)
 - R/V values centered; red text when out of spec
 - Manual / Auto measurement (simulated)
+- Serial reads run on a background worker (meter_io.MeterWorker); GUI drains results via after()
+- Optional continuous-trigger (stream) mode: meter configured once on connect, replies pipelined
+- Multi-meter: extra COM ports each measure their own slice of cells in parallel
+- Sweep: relay/multiplexer scanner reads a whole pack in batched commands
+  (port 'sim://scanner' = scripted stand-in scanner for testing)
+- Port 'sim://pty?latency=..&jitter=..&drop=..' = virtual meter on a real pty (meter_sim.py),
+  for load testing the serial stack with latency/jitter/noise
+- Buffered Run: meter stores all readings in its memory, app downloads the block once
+- Each port is a SerialSession: dropped adapters reopen in the background (backoff),
+  the failed read is retried once; per-port health shown in Instrument I/O
+- Record serial transcript: every byte to/from each meter, timestamped (.mrvt in the
+  save folder); Replay Transcript runs a recording through _read_meter → _refresh_rows
+  → export at full speed (transcript.py)
+- Stage Timings: latency histograms of the measure path (serial reset/write/readline/
+  parse, result queue, array update, rows, big box, scroll, export), dumpable to a file
+- Reset / cell-count change reuse the Main tab widgets (_sync_main); only the
+  first build creates them
+- Redraws (rows, big box, scroll) are coalesced: at most one per frame (render_sched.py)
+- A reading refreshes only its own row (_refresh_cells); the whole table is
+  re-evaluated only when limits change (_apply_settings) or the table is rebuilt
+- Fast startup: Setting tab (and the COM port scan) is built on first selection;
+  serial, transcript, file dialogs and profiler modules are imported on first use;
+  MEASURE_RV_STARTUP_TRACE=1 writes per-phase launch times (startup_trace.py)
+- Profile auto run (Setting, or MEASURE_RV_PROFILE=1): cProfile + tracemalloc report
+  written next to the exports when the run ends (profiling.py)
 - Auto-export toggle (timestamped .txt to chosen folder; default cwd)
+- Limits and snapshot .txt layout live in results.py, shared with the headless
+  runner (python -m measure_rv run ..., no Tk)
+- Per-cell R/V in cell_store.CellStore: array('d') with NaN = not measured + PASS bitmap
 - Auto export saves only AFTER all cells (when ON); Manual saves only when pressing Export
 """
 
 import os, sys, time
-import re
+_T0 = time.perf_counter()   # startup trace นับจากตรงนี้
+import queue
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, messagebox
+
+from meter_io import (MeterWorker, MeterSlot, SerialSession, read_fetc, read_memory_block, split_cells,
+                      open_port, SIM_SCANNER_PORT, SIM_PTY_PORT)
+from meter_parse import parse_reply
+from stage_timer import STAGES
+from profiling import RunProfiler, env_enabled as profile_env_enabled
+from cell_table import VirtualRowTable, CanvasGrid
+from render_sched import RenderScheduler
+from trend_chart import TrendRing, TrendChart
+from startup_trace import StartupTrace
+from results import limits, result_lines, snapshot_path, write_lines, LABEL_OK, LABEL_NG
+from cell_store import CellStore
 
 # ---------------- Theme ----------------
 COLOR_BG        = "#EAF6FF"
@@ -33,9 +76,6 @@ COLOR_PASS_TEXT = "#0E6655"
 COLOR_FAIL_TEXT = "#922B21"
 COLOR_IDLE_TEXT = COLOR_TEXT
 
-LABEL_OK = "PASS"
-LABEL_NG = "NOT PASS"
-
 # -------- Column widths (px) --------
 COL_W_POINT = 110
 COL_W_LAMP  = 80
@@ -44,12 +84,18 @@ COL_LEFT_PAD = 6
 
 RIGHT_TABLE_WIDTH = COL_W_POINT + COL_W_LAMP + COL_W_NUM*2 + 40  # +padding/scrollbar
 
+# -------- Acquisition --------
+RESULT_POLL_MS = 20   # how often the GUI drains the worker's result queue
+
 
         
 class App(tk.Tk):
     def __init__(self):
+        self._startup = StartupTrace(_T0)
+        self._startup.mark("import")
         super().__init__()
-        
+        self._startup.mark("tk")
+
         self.title("Resistance & Voltage Checker")
         self.configure(bg=COLOR_BG)
         self.geometry("1180x720")
@@ -75,6 +121,9 @@ class App(tk.Tk):
         self.mode          = tk.StringVar(value="manual")
         self.save_folder   = tk.StringVar(value="")
         self.auto_export   = tk.BooleanVar(value=False)
+        self.profile_runs  = tk.BooleanVar(value=profile_env_enabled())   # cProfile+tracemalloc ต่อ auto run
+        self.table_engine  = tk.StringVar(value="rows")   # "rows" (widget pool) / "canvas" (drawn grid)
+        self._profiler = None
 
         # ---- limits as Set ± Tol (instead of Min/Max) ----
         self.r_set = tk.DoubleVar(value=10.0)
@@ -85,43 +134,79 @@ class App(tk.Tk):
         # ---- serial settings ----
         self.com_port  = tk.StringVar(value="")
         self.baudrate  = tk.StringVar(value="9600")
-        self.ser = None
+        self.extra_ports = tk.StringVar(value="")        # "COM4, COM5" -> more meters in parallel
+        self.stream_mode = tk.BooleanVar(value=False)   # continuous trigger + pipelined FETC?
+        self.meters = []          # MeterSlot per connected port (session + worker); self.ser = meters[0]
+        self._gen = 0             # bumped on reset so stale readings are dropped
+        self._pty_sims = {}       # 'sim://pty...' -> PtyMeter (alive until Disconnect)
+        self.record_transcript = tk.BooleanVar(value=False)
+        self._transcripts = {}    # port -> TranscriptWriter (one file per port per Connect)
+        self._conn_text = "Status: Disconnected"
 
         # data arrays
         self._init_arrays()
 
-        # auto state
+        # auto state (per-meter tick jobs live on each MeterSlot)
         self._auto_running = False
-        self._auto_job = None
+
+        # ตาราง / กล่องใหญ่ / scroll ถูกวาดรวมกันไม่เกินเฟรมละครั้ง (render_sched.py)
+        self._render = RenderScheduler(self, timer=STAGES.add)
+        self._scroll_target = (0, 8)
+        self.trend_ring = TrendRing()     # R/V ทุก reading ของกะนี้ (ไม่ล้างตอน Reset)
+        self._startup.mark("init")
 
         self._setup_styles()
+        self._startup.mark("styles")
         self._build_ui()
 
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._poll_job = self.after(RESULT_POLL_MS, self._poll_results)
+        self.after_idle(self._startup_done)
+
+    def _startup_done(self):
+        # หน้าต่างแรกขึ้นจอและพร้อมใช้ (mainloop ว่างครั้งแรก)
+        self._startup.mark("first_idle")
+        self._startup.dump_if_enabled()
+
+    @property
+    def ser(self):
+        """พอร์ตหลัก (อาจเป็น None ชั่วคราวระหว่าง session กำลังเปิดพอร์ตใหม่)"""
+        return self.meters[0].ser if self.meters else None
+
     def _ensure_connected(self) -> bool:
         """เช็กว่าเชื่อมต่อ serial แล้วหรือยัง; ยังไม่ต่อให้เตือนและคืน False"""
-        if self.ser and getattr(self.ser, "is_open", True):
+        # กำลัง reconnect ก็ถือว่ายังต่ออยู่ -- worker จะรอพอร์ตกลับมาเอง
+        if self.meters:
             return True
         messagebox.showerror("Serial", "COM Port is not connected.\nPlease connect it before starting the measurement")
         return False
 
     # ---------- helpers for derived bounds ----------
     def _r_bounds(self):
-        rmin = float(self.r_set.get()) - float(self.r_tol.get())
-        rmax = float(self.r_set.get()) + float(self.r_tol.get())
-        return rmin, rmax
+        return limits(self.r_set.get(), self.r_tol.get())
 
     def _v_bounds(self):
-        vmin = float(self.v_set.get()) - float(self.v_tol.get())
-        vmax = float(self.v_set.get()) + float(self.v_tol.get())
-        return vmin, vmax
+        return limits(self.v_set.get(), self.v_tol.get())
 
     # ---------- data ----------
     def _init_arrays(self):
         n = int(self.num_points.get())
-        self.r_values = [None]*n
-        self.v_values = [None]*n
-        self.flags    = [False]*n
+        self.cells = CellStore(n)      # R/V array('d') (NaN = ยังไม่วัด) + PASS bitmap
         self.current_idx = 0
+        self._gen += 1
+        self._assign_slices()
+
+    def _assign_slices(self):
+        """แบ่ง cell ให้แต่ละเครื่อง (เรียกทุกครั้งที่จำนวน cell หรือจำนวนพอร์ตเปลี่ยน)"""
+        for slot, cells in zip(self.meters, split_cells(len(self.cells), len(self.meters))):
+            slot.cells = cells
+            self._update_port_status(slot)
+
+    def _slot_for(self, idx):
+        for slot in self.meters:
+            if idx in slot.cells:
+                return slot
+        return self.meters[0] if self.meters else None
 
     # ---------- styles ----------
     def _setup_styles(self):
@@ -147,7 +232,24 @@ class App(tk.Tk):
         nb.pack(fill="both", expand=True, padx=12, pady=12)
 
         self._build_main()
+        self._startup.mark("main")
+        # Setting สร้างตอนเลือกแท็บครั้งแรก (รวมการ list COM ports ซึ่งช้าบน Windows)
+        self._setting_built = False
+        self._notebook = nb
+        nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    def _on_tab_changed(self, _e=None):
+        if not self._setting_built and self._notebook.select() == str(self.tab_set):
+            self._ensure_setting()
+
+    def _ensure_setting(self):
+        if self._setting_built:
+            return
+        self._setting_built = True
+        t0 = time.perf_counter()
         self._build_setting()
+        self._startup.add("setting", time.perf_counter() - t0)
+        self._startup.dump_if_enabled()
 
     # ---------- Main ----------
     def _build_main(self):
@@ -187,8 +289,19 @@ class App(tk.Tk):
         self.big_canvas = tk.Canvas(left, height=360, bg=COLOR_IDLE_BG,
                                     highlightthickness=1, highlightbackground=COLOR_BORDER)
         self.big_canvas.pack(fill="both", expand=True)
+        # text item เดียวตลอดอายุ canvas: ต่อ reading แค่เปลี่ยนข้อความ/สี, ย้ายตำแหน่งเมื่อ resize เท่านั้น
+        self._big_text = self.big_canvas.create_text(
+            int(self.big_canvas["width"]) / 2, int(self.big_canvas["height"]) / 2,
+            text="", fill=COLOR_IDLE_TEXT, font=("Segoe UI", 60, "bold"))
+        self._big_state = None
+        self.big_canvas.bind("<Configure>", self._place_big_text)
         self._draw_big_box()
 
+        # trend R/V ใต้กล่องใหญ่
+        self.trend_chart = TrendChart(left, self.trend_ring, lambda: (self._r_bounds(), self._v_bounds()),
+                                      height=170, bg=COLOR_PANEL, highlightbackground=COLOR_BORDER)
+        self.trend_chart.pack(fill="x", pady=(8,0))
+
         # --- right panel (fixed width) ---
         right_holder = ttk.Frame(mid, style="Card.TFrame")
         right_holder.pack(side="left", fill="y", padx=(0,0))
@@ -240,61 +353,18 @@ class App(tk.Tk):
             bg=COLOR_PANEL, highlightthickness=1, highlightbackground=COLOR_BORDER
         )
         vbar = ttk.Scrollbar(sc, orient="vertical", command=self.points_canvas.yview)
-        self.points_canvas.configure(yscrollcommand=vbar.set)
 
         # ให้แคนวาสขยายเต็มพื้นที่เพื่อเลื่อนสบายขึ้น
         self.points_canvas.pack(side="left", fill="both", expand=True)
         vbar.pack(side="right", fill="y")
 
-        # เฟรมจริงที่เก็บแถว อยู่ข้างใน Canvas
-        self.points_frame = ttk.Frame(self.points_canvas, style="Card.TFrame")
-        self.points_window = self.points_canvas.create_window((0,0), window=self.points_frame, anchor="nw")
-
-        
-        # อัปเดต scrollregion และให้ความกว้างภายในเท่ากับแคนวาส
-        def _update_scrollregion(_e=None):
-            self.points_canvas.configure(scrollregion=self.points_canvas.bbox("all"))
-            try:
-                self.points_canvas.itemconfigure(self.points_window, width=self.points_canvas.winfo_width())
-            except:
-                pass
-
-        self.points_frame.bind("<Configure>", _update_scrollregion)
-        self.points_canvas.bind("<Configure>", _update_scrollregion)
-        self._bind_scrolling(self.points_frame, self.points_canvas)
+        # ตาราง cell (cell_table.py): rows = widget แค่หนึ่งหน้าจอวนใช้ซ้ำ, canvas = วาดบน Canvas
+        self.points_vbar = vbar
+        self.table = None
+        self._make_table()
+        self._bind_scrolling(self.points_canvas, self.points_canvas)
         # ====== จบส่วน Canvas + Scrollbar ======
 
-        # rows
-        self.row_widgets = []  # (lamp_label, r_var, r_entry, v_var, v_entry)
-        for i in range(self.num_points.get()):
-            rowf = ttk.Frame(self.points_frame, style="Card.TFrame")
-            rowf.grid_columnconfigure(0, minsize=COL_W_POINT, weight=0)
-            rowf.grid_columnconfigure(1, minsize=COL_W_LAMP,  weight=0)
-            rowf.grid_columnconfigure(2, minsize=COL_W_NUM,   weight=0)
-            rowf.grid_columnconfigure(3, minsize=COL_W_NUM,   weight=0)
-            rowf.pack(fill="x", pady=4)
-
-            lbl = ttk.Label(rowf, text=f"Cell {i+1}")
-            lbl.grid(row=0, column=0, sticky="w", padx=(COL_LEFT_PAD,2))
-            lbl.bind("<Button-1>", lambda e, idx=i: self._jump_to(idx))
-
-            lamp = tk.Label(rowf, width=8, height=1, bg=COLOR_NEUTRAL, relief="solid", bd=1)
-            lamp.grid(row=0, column=1, sticky="ew", padx=4)
-
-            r_var = tk.StringVar(value="")
-            r_ent = tk.Entry(rowf, textvariable=r_var, width=20, justify="center",
-                             relief="solid", bd=1)
-            r_ent.configure(state="readonly", readonlybackground="white")
-            r_ent.grid(row=0, column=2, sticky="ew", padx=4, ipady=2)
-
-            v_var = tk.StringVar(value="")
-            v_ent = tk.Entry(rowf, textvariable=v_var, width=20, justify="center",
-                             relief="solid", bd=1)
-            v_ent.configure(state="readonly", readonlybackground="white")
-            v_ent.grid(row=0, column=3, sticky="ew", padx=4, ipady=2)
-
-            self.row_widgets.append((lamp, r_var, r_ent, v_var, v_ent))
-
         # ---- bottom controls ----
         sep = ttk.Separator(wrapper, orient="horizontal")
         sep.pack(fill="x", pady=(10,8))
@@ -304,6 +374,10 @@ class App(tk.Tk):
 
         self.btn_measure = ttk.Button(ctrl, text="Measure (Manual)", command=self._measure_one)
         self.btn_measure.pack(side="left", padx=(0,8), ipady=2)
+        self.btn_sweep = ttk.Button(ctrl, text="Sweep", command=self._sweep)
+        self.btn_sweep.pack(side="left", padx=(0,8), ipady=2)
+        self.btn_buffered = ttk.Button(ctrl, text="Buffered Run", command=self._buffered_run)
+        self.btn_buffered.pack(side="left", padx=(0,8), ipady=2)
 
         self.lbl_ohm = ttk.Label(ctrl, text="— mΩ", style="Live.TLabel"); self.lbl_ohm.pack(side="left", padx=20)
         self.lbl_volt= ttk.Label(ctrl, text="— V",  style="Live.TLabel"); self.lbl_volt.pack(side="left", padx=20)
@@ -376,6 +450,15 @@ class App(tk.Tk):
         ttk.Entry(r2, textvariable=self.v_tol, width=10, justify="center").pack(side="left", padx=(6,6))
         ttk.Label(r2, text="V", style="Muted.TLabel").pack(side="left")
 
+        rg = ttk.Frame(meas, style="Card.TFrame"); rg.pack(anchor="w", pady=6, fill="x")
+        ttk.Label(rg, text="Cell Table", width=16).pack(side="left")
+        ttk.Radiobutton(rg, text="Rows", value="rows", variable=self.table_engine).pack(side="left", padx=(8,0))
+        ttk.Radiobutton(rg, text="Drawn grid (large packs)", value="canvas",
+                        variable=self.table_engine).pack(side="left", padx=(8,0))
+
+        ttk.Checkbutton(meas, text="Profile auto runs (cProfile + memory, saved next to exports)",
+                        variable=self.profile_runs).pack(anchor="w", pady=(6,0))
+
         ttk.Button(meas, text="Apply", command=self._apply_settings).pack(anchor="w", pady=(10,2))
         ttk.Label(meas, text="Condition: |R - R_set| ≤ R_tol และ |V - V_set| ≤ V_tol", style="Muted.TLabel").pack(anchor="w")
 
@@ -396,16 +479,36 @@ class App(tk.Tk):
         if not self.combo_baud.get(): self.combo_baud.set("9600")
         self.combo_baud.pack(side="left", padx=(8,8))
 
+        rx = ttk.Frame(io, style="Card.TFrame"); rx.pack(fill="x", pady=6)
+        ttk.Label(rx, text="Extra Ports", width=12).pack(side="left")
+        ttk.Entry(rx, textvariable=self.extra_ports, width=20).pack(side="left", padx=(8,8))
+        ttk.Label(rx, text="(e.g. COM4, COM5)", style="Muted.TLabel").pack(side="left")
+
+        rs = ttk.Frame(io, style="Card.TFrame"); rs.pack(fill="x", pady=6)
+        ttk.Checkbutton(rs, text="Continuous trigger (stream readings)", variable=self.stream_mode).pack(side="left")
+        ttk.Label(rs, text="(applies on Connect)", style="Muted.TLabel").pack(side="left", padx=6)
+
+        rt = ttk.Frame(io, style="Card.TFrame"); rt.pack(fill="x", pady=6)
+        ttk.Checkbutton(rt, text="Record serial transcript", variable=self.record_transcript).pack(side="left")
+        ttk.Button(rt, text="Replay Transcript...", command=self._replay_transcript).pack(side="left", padx=(12,0))
+        ttk.Button(rt, text="Stage Timings...", command=self._show_stage_timings).pack(side="left", padx=(8,0))
+
         rc = ttk.Frame(io, style="Card.TFrame"); rc.pack(fill="x", pady=6)
         self.btn_connect = ttk.Button(rc, text="Connect", command=self._connect_serial); self.btn_connect.pack(side="left")
         self.btn_disconnect = ttk.Button(rc, text="Disconnect", command=self._disconnect_serial); self.btn_disconnect.pack(side="left", padx=8)
         ttk.Button(rc, text="Test Read", command=self._test_read).pack(side="left", padx=(8,0))
 
-        self.lbl_conn = ttk.Label(io, text="Status: Disconnected", style="Muted.TLabel")
+        self.lbl_conn = ttk.Label(io, text=self._conn_text, style="Muted.TLabel")
         self.lbl_conn.pack(anchor="w", pady=(8,0))
 
+        # สถานะแยกตามพอร์ต (สร้างใหม่ทุกครั้งที่ connect)
+        self.port_status_frame = ttk.Frame(io, style="Card.TFrame")
+        self.port_status_frame.pack(fill="x", pady=(4,0))
+        self.port_status_labels = {}
+
         self._refresh_com_ports()
         self._update_serial_buttons()
+        self._refresh_port_status()   # สร้างหลัง Connect ได้ (เช่นต่อจาก script)
 
     # ---------- Settings apply ----------
     def _apply_settings(self):
@@ -417,12 +520,17 @@ class App(tk.Tk):
         except Exception as e:
             messagebox.showerror("Invalid", f"Settings error: {e}"); return
 
-        # ถ้าจำนวนจุดเปลี่ยน ต้อง rebuild main
-        need_rebuild = (n != len(self.r_values))
-        if need_rebuild:
+        # engine ของตารางเปลี่ยน → สร้างเฉพาะตารางใหม่ (ค่าเดิมยังอยู่)
+        want = CanvasGrid if self.table_engine.get() == "canvas" else VirtualRowTable
+        if type(self.table) is not want:
+            self._make_table()
+            self._scroll_row_into_view(self.current_idx)
+
+        # ถ้าจำนวนจุดเปลี่ยน: ล้างค่าแล้วปรับตารางเดิม (ไม่ต้องสร้างหน้า Main ใหม่)
+        if n != len(self.cells):
             self._auto_stop()
             self._init_arrays()
-            self._build_main()
+            self._sync_main()
         else:
             # แค่ค่าลิมิต/interval เปลี่ยน → refresh
             self._refresh_limits_labels()
@@ -434,6 +542,7 @@ class App(tk.Tk):
     def _refresh_limits_labels(self):
         rmin, rmax = self._r_bounds()
         vmin, vmax = self._v_bounds()
+        self._render.request("trend", self._render_trend)   # แถบ limit บนกราฟ
         self.lbl_rmin.config(text=f"{rmin:.3g}")
         self.lbl_rmax.config(text=f"{rmax:.3g}")
         self.lbl_vmin.config(text=f"{vmin:.3g}")
@@ -450,42 +559,119 @@ class App(tk.Tk):
             )
         except Exception as e:
             print("List COM error:", e)
-        self.combo_port["values"] = ports
-        if self.com_port.get() not in ports:
+        sims = [SIM_SCANNER_PORT] + ([SIM_PTY_PORT] if os.name == "posix" else [])
+        self.combo_port["values"] = ports + sims
+        if self.com_port.get() not in ports + sims:
             self.com_port.set(ports[0] if ports else "")
 
     def _connect_serial(self):
         try:
-            import serial
             port = self.com_port.get().strip()
             if not port:
                 messagebox.showwarning("Serial", "Please select a COM Port."); return
             baud = int(self.baudrate.get())
-            if self.ser:
-                try: self.ser.close()
-                except: pass
-            self.ser = serial.Serial(port=port, baudrate=baud, timeout=1)
-            self.lbl_conn.config(text=f"Status: Connected to {port} @ {baud} bps")
-            messagebox.showinfo("Serial", f"Connected to {port} @ {baud} bps")
+            ports = [port] + [p for p in self._extra_port_list() if p != port]
+            self._close_meters()
+            if self.record_transcript.get():
+                self._start_transcripts(ports)
+            for p in ports:
+                session = SerialSession(p, baud, self._open_port)
+                session.open()
+                self.meters.append(MeterSlot(session, self._make_worker(session)))
+            for slot in self.meters:
+                slot.worker.start()
+            self._assign_slices()
+            mode = " (stream)" if self.stream_mode.get() else ""
+            names = ", ".join(ports)
+            self._set_conn_status(f"Status: Connected to {names} @ {baud} bps{mode}")
+            messagebox.showinfo("Serial", f"Connected to {names} @ {baud} bps")
         except Exception as e:
-            self.ser = None
-            self.lbl_conn.config(text="Status: Disconnected")
+            self._close_meters()
+            self._set_conn_status("Status: Disconnected")
             messagebox.showerror("Serial", f"Connect failed:\n{e}")
+        self._refresh_port_status()
         self._update_serial_buttons()
 
     def _disconnect_serial(self):
-        try:
-            if self.ser: self.ser.close()
-        except: pass
-        self.ser = None
-        self.lbl_conn.config(text="Status: Disconnected")
+        self._auto_stop()
+        self._close_meters()
+        self._set_conn_status("Status: Disconnected")
+        self._refresh_port_status()
         self._update_serial_buttons()
         messagebox.showinfo("Serial", "Disconnected")
 
+    def _set_conn_status(self, text):
+        self._conn_text = text
+        if getattr(self, "lbl_conn", None) is not None:   # Setting ยังไม่ถูกสร้าง → แสดงตอนสร้าง
+            self.lbl_conn.config(text=text)
+
+    def _extra_port_list(self):
+        return [p.strip() for p in self.extra_ports.get().replace(";", ",").split(",") if p.strip()]
+
+    def _open_port(self, port, baud):
+        """เปิดพอร์ต (เรียกตอน Connect และทุกครั้งที่ session เปิดพอร์ตใหม่ใน worker thread)"""
+        ser = self._open_raw_port(port, baud)
+        w = self._transcripts.get(port)
+        if w is None:
+            return ser
+        from transcript import RecordingSerial
+        return RecordingSerial(ser, w)
+
+    def _open_raw_port(self, port, baud):
+        # meter จำลองบน pty: reconnect ใช้ตัวจำลองเดิมใน self._pty_sims
+        return open_port(port, baud, self._pty_sims)
+
+    def _make_worker(self, session):
+        return MeterWorker(session, read_fn=self._read_meter,
+                           block_fn=lambda ser, count: self._query_memory_block(count, ser),
+                           stream=bool(self.stream_mode.get()))
+
+    def _close_meters(self):
+        for slot in self.meters:
+            if slot.auto_job is not None:
+                self.after_cancel(slot.auto_job); slot.auto_job = None
+            slot.close()
+        self.meters = []
+        for sim in self._pty_sims.values():
+            sim.stop()
+        self._pty_sims = {}
+        for w in self._transcripts.values():
+            w.close()
+        self._transcripts = {}
+
+    def _start_transcripts(self, ports):
+        from transcript import TranscriptWriter
+        folder = self.save_folder.get().strip() or os.getcwd()
+        os.makedirs(folder, exist_ok=True)
+        ts = time.strftime("%Y%m%d_%H%M%S")
+        for p in ports:
+            safe = "".join(c if c.isalnum() else "_" for c in p.split("?")[0])
+            path = os.path.join(folder, f"transcript_{safe}_{ts}.mrvt")
+            self._transcripts[p] = TranscriptWriter(path, port=p)
+
+    def _refresh_port_status(self):
+        if getattr(self, "port_status_frame", None) is None:  # not built yet
+            return
+        for c in self.port_status_frame.winfo_children(): c.destroy()
+        self.port_status_labels = {}
+        for slot in self.meters:
+            lbl = ttk.Label(self.port_status_frame, text="", style="Muted.TLabel")
+            lbl.pack(anchor="w")
+            self.port_status_labels[slot.port] = lbl
+            self._update_port_status(slot)
+
+    def _update_port_status(self, slot):
+        lbl = getattr(self, "port_status_labels", {}).get(slot.port)
+        if lbl is None:
+            return
+        cells = f"cells {slot.cells.start+1}-{slot.cells.stop}" if len(slot.cells) else "no cells"
+        slot.shown_state = slot.session.state
+        lbl.config(text=f"{slot.port}: {cells} · {slot.session.summary()}")
+
     def _update_serial_buttons(self):
         if getattr(self, "btn_connect", None) is None:  # not built yet
             return
-        if self.ser:
+        if self.meters:
             self.btn_connect.state(["disabled"])
             self.btn_disconnect.state(["!disabled"])
         else:
@@ -506,6 +692,7 @@ class App(tk.Tk):
         self.btn_auto_stop.state(["!disabled" if is_auto else "disabled"])
 
     def _browse_folder(self):
+        from tkinter import filedialog
         path = filedialog.askdirectory(title="Choose folder to save")
         if path:
             self.save_folder.set(path)
@@ -521,14 +708,6 @@ class App(tk.Tk):
         self._update_big_box()
         self._scroll_row_into_view(idx)
 
-    def _update_points_scroll(self, _e=None):
-        # (ยังคงอยู่เพื่อความเข้ากันได้ — ตอนนี้เราใช้ _update_scrollregion ภายใน _build_main แล้ว)
-        self.points_canvas.configure(scrollregion=self.points_canvas.bbox("all"))
-        try:
-            self.points_canvas.itemconfigure(self.points_window, width=self.points_canvas.winfo_width())
-        except: 
-            pass
-
     def _bind_scrolling(self, widget, canvas):
         def on_wheel(e): canvas.yview_scroll(-1 if e.delta>0 else 1, "units")
         widget.bind("<Enter>", lambda _: widget.bind_all("<MouseWheel>", on_wheel))
@@ -538,28 +717,19 @@ class App(tk.Tk):
         widget.bind_all("<Button-5>", lambda e: canvas.yview_scroll( 1, "units"))
 
     def _scroll_row_into_view(self, idx, margin=8):
-        if not (0 <= idx < len(self.row_widgets)): return
-        self.points_canvas.update_idletasks()
-        rows = self.points_frame.winfo_children()
-        rowf = rows[idx]
-        y = rowf.winfo_y()
-        h = rowf.winfo_height()
-        top = self.points_canvas.canvasy(0)
-        bottom = top + self.points_canvas.winfo_height()
-        if y < top + margin:
-            new_top = max(0, y - margin)
-        elif (y + h) > (bottom - margin):
-            new_top = (y + h + margin) - self.points_canvas.winfo_height()
-        else:
-            return
-        total = max(1, self.points_frame.winfo_height())
-        self.points_canvas.yview_moveto(max(0, new_top)/total)
+        # หลายคำขอในเฟรมเดียว → เลื่อนครั้งเดียวไปยังตัวล่าสุด
+        self._scroll_target = (idx, margin)
+        self._render.request("scroll", self._render_scroll)
+
+    def _render_scroll(self):
+        self.table.scroll_into_view(*self._scroll_target)
 
     # ---------- rendering ----------
-    def _draw_big_box(self):
-        self.big_canvas.delete("all")
-        r = self.r_values[self.current_idx]
-        v = self.v_values[self.current_idx]
+    def _place_big_text(self, e):
+        self.big_canvas.coords(self._big_text, e.width / 2, e.height / 2)
+
+    def _draw_big_box(self, idx=None):
+        r, v = self.cells.get(self.current_idx if idx is None else idx)
         if r is None and v is None:
             bg, fg, text = COLOR_IDLE_BG, COLOR_IDLE_TEXT, ""
         else:
@@ -571,149 +741,277 @@ class App(tk.Tk):
             bg = COLOR_PASS_BG if is_pass else COLOR_FAIL_BG
             fg = COLOR_PASS_TEXT if is_pass else COLOR_FAIL_TEXT
             text = LABEL_OK if is_pass else LABEL_NG
+        if (bg, fg, text) == self._big_state:
+            return
+        self._big_state = (bg, fg, text)
         self.big_canvas.configure(bg=bg)
-        w = self.big_canvas.winfo_width()  or int(self.big_canvas["width"])
-        h = self.big_canvas.winfo_height() or int(self.big_canvas["height"])
-        self.big_canvas.create_text(w/2, h/2, text=text, fill=fg, font=("Segoe UI", 60, "bold"))
+        self.big_canvas.itemconfigure(self._big_text, text=text, fill=fg)
+
+    def _make_table(self):
+        """สร้างตาราง cell ใน points_canvas ตาม engine ที่เลือกใน Setting"""
+        if self.table is not None:
+            self.table.destroy()
+        cls = CanvasGrid if self.table_engine.get() == "canvas" else VirtualRowTable
+        self.table = cls(self.points_canvas, self.points_vbar, len(self.cells),
+                         self._cell_view, self._jump_to,
+                         cols=(COL_W_POINT, COL_W_LAMP, COL_W_NUM, COL_W_NUM), left_pad=COL_LEFT_PAD)
 
     def _refresh_rows(self):
+        """ประเมินและวาดใหม่ทั้งตาราง -- ใช้เมื่อ limit เปลี่ยนหรือสร้างตารางใหม่เท่านั้น"""
+        self.cells.evaluate(self._r_bounds(), self._v_bounds())
+        # วาดเฉพาะแถวที่อยู่บนจอ (เฟรมถัดไป); แถวอื่นจะถูกวาดตอนเลื่อนมาถึง
+        self._render.request("rows", self._render_rows)
+
+    def _refresh_cells(self, indices):
+        """อัปเดตเฉพาะ cell ที่ค่าเปลี่ยน (flag + แถวในตารางถ้าอยู่บนจอ) -- ใช้หลังได้ค่าทุกครั้ง"""
+        self.cells.evaluate(self._r_bounds(), self._v_bounds(), indices)
+        self._render.request("rows", self._render_rows, indices)
+
+    def _render_rows(self, indices=None):
+        self.table.refresh(indices)
+
+    def _cell_view(self, i):
+        """(R text, V text, lamp color, R color, V color) ของ cell i สำหรับตาราง"""
+        r, v = self.cells.get(i)
         rmin, rmax = self._r_bounds()
         vmin, vmax = self._v_bounds()
-        for i,(lamp, r_var, r_ent, v_var, v_ent) in enumerate(self.row_widgets):
-            r = self.r_values[i]
-            v = self.v_values[i]
-
-            if r is None: r_var.set("")
-            else:        r_var.set(f"{r:.2f}")
-            if v is None: v_var.set("")
-            else:         v_var.set(f"{v:.4f}")
+        ok_r = (r is not None) and (rmin <= r <= rmax)
+        ok_v = (v is not None) and (vmin <= v <= vmax)
+        lamp = COLOR_GREEN if (ok_r and ok_v) else (COLOR_RED if (r is not None or v is not None) else COLOR_NEUTRAL)
+        return ("" if r is None else f"{r:.2f}",
+                "" if v is None else f"{v:.4f}",
+                lamp,
+                "red" if (r is not None and not ok_r) else COLOR_TEXT,
+                "red" if (v is not None and not ok_v) else COLOR_TEXT)
 
-            ok_r = (r is not None) and (rmin <= r <= rmax)
-            ok_v = (v is not None) and (vmin <= v <= vmax)
-            is_pass = ok_r and ok_v
-            self.flags[i] = (r is not None) and (v is not None) and is_pass
+    def _update_big_box(self):
+        # จำ cell ตอนขอ: ก่อนถึงรอบวาด current_idx อาจเลื่อนไป cell ถัดไป (auto/manual) แล้ว
+        self._big_idx = self.current_idx
+        self._render.request("big_box", self._render_big_box)
 
-            lamp.configure(bg=COLOR_GREEN if is_pass else (COLOR_RED if (r is not None or v is not None) else COLOR_NEUTRAL))
+    def _add_trend(self, r, v):
+        self.trend_ring.append(r, v)
+        self._render.request("trend", self._render_trend)
 
-            r_ent.configure(state="normal", fg=("red" if (r is not None and not ok_r) else COLOR_TEXT))
-            v_ent.configure(state="normal", fg=("red" if (v is not None and not ok_v) else COLOR_TEXT))
-            r_ent.configure(state="readonly")
-            v_ent.configure(state="readonly")
+    def _render_trend(self):
+        self.trend_chart.redraw()
 
-    def _update_big_box(self):
-        r = self.r_values[self.current_idx]
-        v = self.v_values[self.current_idx]
+    def _render_big_box(self):
+        idx = self._big_idx if 0 <= self._big_idx < len(self.cells) else self.current_idx
+        r, v = self.cells.get(idx)
         self.lbl_ohm.config(text=("— mΩ" if r is None else f"{r:.2f} mΩ"))   # <-- 2 decimal
         self.lbl_volt.config(text=("— V"  if v is None else f"{v:.4f} V"))   # <-- 4 decimal
-        self._draw_big_box()
+        self._draw_big_box(idx)
 
-    def _read_meter(self):
+    def _read_meter(self, ser=None):
         """
-        อ่านค่าจากเครื่องวัดผ่าน Serial
-        โพรโทคอลตัวอย่าง: ส่ง 'FETC?' แล้วเครื่องตอบแบบ
-        '+5.87263E-03,+3.09940E+00,+0'
-        - ตัวแรก = R (โอห์ม) -> แปลงเป็น mΩ สำหรับ GUI
-        - ตัวที่สอง = V (โวลต์)
+        อ่านค่า 1 ครั้ง (R เป็น mΩ, V เป็นโวลต์) -- ถูกเรียกจาก MeterWorker thread เท่านั้น
+        ห้ามแตะ Tk ในนี้
         """
-        if not self.ser or not getattr(self.ser, "is_open", True):
-            raise RuntimeError("Serial not connected")
-
-        try:
-            # เคลียร์บัฟเฟอร์ (กันค้าง)
-            if hasattr(self.ser, "reset_input_buffer"):
-                self.ser.reset_input_buffer()
-            if hasattr(self.ser, "reset_output_buffer"):
-                self.ser.reset_output_buffer()
-
-            # ส่งคำสั่งอ่าน (ปรับ \r\n ตามเครื่องของคุณ)
-            cmd = b"FETC?\r\n"
-            self.ser.write(cmd)
-            self.ser.flush()
-
-            # อ่าน 1 บรรทัด
-            raw = self.ser.readline().decode("ascii", "ignore").strip()
-            if not raw:
-                # เผื่อบางรุ่นต้อง read_until
-                raw = self.ser.read_until(b"\n", 200).decode("ascii", "ignore").strip()
-            if not raw:
-                raise TimeoutError("No response received from the device.")
-
-            # แยกและแปลงเป็นตัวเลข
-            parts = re.split(r"[,\s]+", raw)
-            nums = []
-            for p in parts:
-                try:
-                    nums.append(float(p))
-                except:
-                    pass
-
-            if len(nums) < 2:
-                raise ValueError(f"Invalid data format: {raw!r}")
-
-            r_ohm = float(nums[0])
-            v_volt = float(nums[1])
-
-            # แปลง R (Ω) -> mΩ สำหรับแสดงใน GUI
-            r_milliohm = r_ohm * 1000.0
-            return r_milliohm, v_volt
-
-        except Exception as e:
-            # โยนต่อให้ผู้เรียกจัดการ (เพื่อขึ้น popup และหยุดลูป auto)
-            raise
+        return read_fetc(ser or self.ser)
 
     def _test_read(self):
         """ทดสอบอ่านค่า 1 ครั้งจากเครื่อง ถ้าไม่ได้ต่อ COM จะขึ้น popup เตือน"""
         if not self._ensure_connected():
             return
-        try:
-            r, v = self._read_meter()
-            messagebox.showinfo("Test Read", f"Read OK\nR = {r:.2f} mΩ\nV = {v:.4f} V")
-        except Exception as e:
-            messagebox.showerror("Test Read", f"Read failed:\n{e}")
+        slot = self.meters[0]
+        if slot.pending is not None:
+            return
+        # idx=None -> ผลลัพธ์จะแสดงเป็น popup ใน _on_result
+        slot.pending = (self._gen, False)
+        slot.worker.request(None)
 
 
     # ---------- measurement ----------
     def _measure_one(self, from_auto: bool = False):
+        """ส่งคำขออ่านค่า cell ปัจจุบันให้เครื่องที่ดูแล cell นั้น; ผลจะกลับมาที่ _on_result"""
         # ยังไม่ต่อ COM → เตือนและยกเลิก
         if not self._ensure_connected():
             if from_auto:
                 self._auto_stop()
             return
+        self._request(self._slot_for(self.current_idx), self.current_idx, from_auto)
 
-        idx = self.current_idx
-        try:
-            r, v = self._read_meter()
-        except Exception as e:
+    def _request(self, slot, idx, from_auto):
+        if slot.pending is not None:   # มีคำขอค้างอยู่แล้ว
+            return
+        slot.pending = (self._gen, from_auto)
+        slot.worker.request(idx)
+
+    def _poll_results(self):
+        for slot in list(self.meters):
+            if slot.session.state != slot.shown_state:   # เช่น reconnecting → connected
+                self._update_port_status(slot)
+            while slot.worker is not None:
+                try:
+                    item = slot.worker.results.get_nowait()
+                except queue.Empty:
+                    break
+                self._on_result(slot, *item)
+        self._poll_job = self.after(RESULT_POLL_MS, self._poll_results)
+
+    def _on_result(self, slot, idx, r, v, ts, err):
+        if slot.pending is None:
+            return
+        STAGES.add("queue", time.time() - ts)   # ได้ค่าจากเครื่อง → GUI หยิบมาใช้
+        if slot.sweep_left:
+            self._apply_sweep_result(slot, idx, r, v, err)
+            return
+        if isinstance(idx, list):   # buffered run: ทั้งช่วงมาในก้อนเดียว
+            gen = slot.pending[0]
+            slot.pending = None
+            self._apply_block_result(slot, idx, r, v, err, gen)
+            return
+        gen, from_auto = slot.pending
+        slot.pending = None
+        self._apply_result(slot, idx, r, v, err, gen, from_auto)
+
+        # นัดรอบ auto ถัดไปของเครื่องนี้หลังได้ค่าแล้ว (รวมกรณีกด Start ระหว่างที่ยังรอค่าเก่าอยู่)
+        if self._auto_running and slot.cursor is not None and slot.auto_job is None:
+            interval = max(50, int(self.auto_interval.get()))
+            slot.auto_job = self.after(interval, lambda s=slot: self._tick_auto(s))
+
+    def _apply_result(self, slot, idx, r, v, err, gen, from_auto):
+        if idx is None:   # Test Read
+            if err is not None:
+                messagebox.showerror("Test Read", f"Read failed:\n{err}")
+            else:
+                messagebox.showinfo("Test Read", f"Read OK\nR = {r:.2f} mΩ\nV = {v:.4f} V")
+            return
+
+        # reset/apply ระหว่างรอ → ทิ้งค่าเก่า
+        if gen != self._gen or not (0 <= idx < len(self.cells)):
+            return
+        if from_auto and not self._auto_running:
+            return
+
+        if err is not None:
+            self._update_port_status(slot)
             # แจ้ง error และถ้าอยู่ในโหมด auto ให้หยุด
-            messagebox.showerror("Measure Error", f"Failed to read data:\n{e}")
             if from_auto:
                 self._auto_stop()
+            messagebox.showerror("Measure Error", f"Failed to read data ({slot.port}):\n{err}")
             return
+        self._update_port_status(slot)
 
         # อัปเดตค่า
-        self.r_values[idx] = r
-        self.v_values[idx] = v
-        self._refresh_rows()
+        t0 = time.perf_counter()
+        self.cells.set(idx, r, v)
+        self.current_idx = idx
+        self._add_trend(r, v)
+        STAGES.add("array", time.perf_counter() - t0)
+        # วาดจริงรอบเฟรมถัดไป (stage rows / big_box / scroll ถูกจับเวลาตอนวาด)
+        self._refresh_cells((idx,))
         self._update_big_box()
 
-        # ไป cell ถัดไป หรือสรุปจบ
-        if self.current_idx < self.num_points.get() - 1:
-            self.current_idx += 1
-            self.point_combo.current(self.current_idx)
-            self._scroll_row_into_view(self.current_idx)
+        if from_auto:
+            # เครื่องนี้ไป cell ถัดไปในช่วงของตัวเอง
+            nxt = idx + 1
+            slot.cursor = nxt if nxt < slot.cells.stop else None
+            if slot.cursor is not None:
+                self._go_to_cell(nxt)
+            elif all(s.cursor is None for s in self.meters):
+                # ครบทุกจุด (ทุกเครื่อง)
+                if self.auto_export.get():
+                    self._export_snapshot()
+                self._auto_running = False
+                self._update_mode_buttons()
+                report = self._finish_profile()
+                msg = "Auto measurement finished." + (f"\nProfile: {report}" if report else "")
+                self.after(0, lambda: messagebox.showinfo("Auto", msg))
+        elif idx < self.num_points.get() - 1:
+            # ไป cell ถัดไป
+            self._go_to_cell(idx + 1)
         else:
-            # ครบทุกจุด
-            if from_auto and self.auto_export.get():
+            messagebox.showinfo("Done", "Measured all cells.")
+
+    # ---------- scanner sweep ----------
+    def _sweep(self):
+        """วัดทุก cell ผ่าน scanner: แต่ละเครื่องกวาดช่วง cell ของตัวเอง (channel 1 = cell แรกของช่วง)"""
+        if not self._ensure_connected():
+            return
+        if self._auto_running or any(s.pending is not None for s in self.meters):
+            return
+        for slot in self.meters:
+            cells = list(slot.cells)
+            if not cells:
+                continue
+            slot.pending = (self._gen, False)
+            slot.sweep_left = len(cells)
+            slot.worker.request_sweep(cells, first_channel=1)
+
+    def _apply_sweep_result(self, slot, idx, r, v, err):
+        gen = slot.pending[0]
+        slot.sweep_left = 0 if err is not None else slot.sweep_left - 1   # worker จบ sweep ที่ error แรก
+        if slot.sweep_left == 0:
+            slot.pending = None
+        # reset ระหว่าง sweep → นับค่าที่เหลือทิ้งไปจนครบ แต่ไม่บันทึก
+        if gen != self._gen or not (0 <= idx < len(self.cells)):
+            return
+
+        if err is not None:
+            self._update_port_status(slot)
+            messagebox.showerror("Sweep Error", f"Sweep stopped at Cell {idx+1} ({slot.port}):\n{err}")
+        else:
+            self.cells.set(idx, r, v)
+            self.current_idx = idx
+            self._add_trend(r, v)
+            self._refresh_cells((idx,))
+            self._update_big_box()
+
+        if all(s.sweep_left == 0 for s in self.meters):
+            for s in self.meters: self._update_port_status(s)
+            self._go_to_cell(self.current_idx)
+            if self.auto_export.get():
                 self._export_snapshot()
+            self.after(0, lambda: messagebox.showinfo("Sweep", "Sweep finished."))
 
-            if from_auto:
-                self._auto_running = False
-                if self._auto_job is not None:
-                    self.after_cancel(self._auto_job); self._auto_job = None
-                self._update_mode_buttons()
-                self.after(0, lambda: messagebox.showinfo("Auto", "Auto measurement finished."))
-            else:
-                messagebox.showinfo("Done", "Measured all cells.")
+    # ---------- buffered run ----------
+    def _buffered_run(self):
+        """ให้เครื่องเก็บค่าทั้งช่วงในหน่วยความจำของเครื่อง แล้วดึงกลับทีเดียว (ทุกเครื่องพร้อมกัน)"""
+        if not self._ensure_connected():
+            return
+        if self._auto_running or any(s.pending is not None for s in self.meters):
+            return
+        for slot in self.meters:
+            cells = list(slot.cells)
+            if not cells:
+                continue
+            slot.pending = (self._gen, False)
+            slot.worker.request_buffered(cells)
+
+    def _apply_block_result(self, slot, cells, rs, vs, err, gen):
+        if gen != self._gen:
+            return
+        if err is not None:
+            self._update_port_status(slot)
+            messagebox.showerror("Buffered Run", f"Buffered run failed ({slot.port}):\n{err}")
+        else:
+            # ใส่ค่าทั้งก้อนในรอบเดียว แล้ว refresh เฉพาะ cell ของก้อนนี้ครั้งเดียว
+            n = len(self.cells)
+            got = []
+            for idx, r, v in zip(cells, rs, vs):
+                if idx < n:
+                    self.cells.set(idx, r, v)
+                    self._add_trend(r, v)
+                    got.append(idx)
+            self._update_port_status(slot)
+            self._refresh_cells(got)
+            if got:
+                self.current_idx = max(got)
+
+        # เครื่องที่ error ก็นับว่าจบ -> เครื่องสุดท้ายที่จบ (สำเร็จหรือไม่) เป็นคนปิดรอบ
+        if all(s.pending is None for s in self.meters):
+            self._update_big_box()
+            self._go_to_cell(self.current_idx)
+            if self.auto_export.get():
+                self._export_snapshot()
+            self.after(0, lambda: messagebox.showinfo("Buffered Run", "Buffered run finished."))
+
+    def _go_to_cell(self, idx):
+        self.current_idx = idx
+        self.point_combo.current(idx)
+        self._scroll_row_into_view(idx)
 
     def _auto_start(self):
         if not self._ensure_connected():
@@ -722,48 +1020,56 @@ class App(tk.Tk):
             return
         self._auto_running = True
         self._update_mode_buttons()
-        self._tick_auto()
-
+        if self.profile_runs.get() and self._profiler is None:
+            folder = self.save_folder.get().strip() or os.getcwd()
+            self._profiler = RunProfiler(folder, self.model_name.get().strip() or "model").start()
+        # เริ่มจาก cell ปัจจุบันจนจบ; แต่ละเครื่องวัดช่วงของตัวเองพร้อมกัน
+        for slot in self.meters:
+            start = max(slot.cells.start, self.current_idx)
+            slot.cursor = start if start < slot.cells.stop else None
+        for slot in self.meters:
+            if slot.cursor is not None:
+                self._tick_auto(slot)
 
     def _auto_stop(self):
         self._auto_running = False
-        if self._auto_job is not None:
-            self.after_cancel(self._auto_job)
-            self._auto_job = None
+        for slot in self.meters:
+            slot.cursor = None
+            if slot.auto_job is not None:
+                self.after_cancel(slot.auto_job)
+                slot.auto_job = None
         self._update_mode_buttons()
+        self._finish_profile()   # หยุดกลางทาง ก็ยังเขียนรายงานของช่วงที่วัดไปแล้ว
+
+    def _finish_profile(self):
+        prof, self._profiler = self._profiler, None
+        if prof is None:
+            return None
+        try:
+            return prof.stop()
+        except Exception as e:
+            messagebox.showerror("Profile", f"Writing the profile failed:\n{e}")
+            return None
 
-    def _tick_auto(self):
-        if not self._auto_running:
+    def _tick_auto(self, slot):
+        slot.auto_job = None
+        if not self._auto_running or slot.cursor is None:
             return
-        self._measure_one(from_auto=True)
-        if self._auto_running:  # นัดรอบถัดไปเฉพาะถ้ายังไม่จบ
-            interval = max(50, int(self.auto_interval.get()))
-            self._auto_job = self.after(interval, self._tick_auto)
+        # รอบถัดไปถูกนัดใน _on_result เมื่อได้ค่ากลับมาแล้ว
+        self._request(slot, slot.cursor, from_auto=True)
 
     def _parse_meter_line(self, line: str):
         """
         แปลงสตริงจากเครื่อง:  +5.87263E-03,+3.09940E+00,+0
         คืนค่า (r_ohm, v_volt, status)  -- r_ohm เป็น 'โอห์ม' (ยังไม่คูณเป็น mΩ)
         """
-        s = (line or "").strip()
-        parts = [p.strip() for p in s.split(",")]
-        if len(parts) < 2:
-            raise ValueError(f"bad format: {s}")
-
-        r_ohm  = float(parts[0])
-        v_volt = float(parts[1])
-        status = None
-        if len(parts) >= 3:
-            try:
-                status = int(parts[2].replace("+", ""))
-            except Exception:
-                status = None
-        return r_ohm, v_volt, status
-
-
-    def _query_fetc_once(self, line_ending=b"\r\n", timeout_ms=1500):
+        return parse_reply(line)
+
+
+    def _query_fetc_once(self, line_ending=b"\r\n", timeout_ms=None):
         """
         ส่งคำสั่ง FETC? แล้วอ่าน 1 บรรทัดกลับมา (decode เป็น str)
+        timeout_ms=None -> ใช้ deadline จาก latency ที่วัดได้ของพอร์ตหลัก
         """
         if not self.ser:
             raise RuntimeError("serial not connected")
@@ -777,20 +1083,27 @@ class App(tk.Tk):
         # ส่งคำสั่ง (ส่วนใหญ่ SCPI ใช้ \n หรือ \r\n — ลอง \r\n ก่อน)
         self.ser.write(b"FETC?" + line_ending)
 
-        # อ่านคำตอบ 1 บรรทัด
-        old_to = self.ser.timeout
-        self.ser.timeout = max(0.1, timeout_ms/1000.0)
+        # อ่านคำตอบ 1 บรรทัด (ตั้ง timeout เฉพาะเมื่อค่าเปลี่ยน ไม่สลับไปมาทุกครั้ง)
+        if timeout_ms is None:
+            t = self.meters[0].session.tracker.deadline()
+        else:
+            t = max(0.1, timeout_ms/1000.0)
+        if self.ser.timeout != t:
+            self.ser.timeout = t
+        raw = self.ser.readline()
+        if not raw:
+            raise TimeoutError("serial timeout")
         try:
-            raw = self.ser.readline()
-            if not raw:
-                raise TimeoutError("serial timeout")
-            try:
-                return raw.decode("ascii", errors="ignore")
-            except Exception:
-                return raw.decode("utf-8", errors="ignore")
-        finally:
-            self.ser.timeout = old_to
+            return raw.decode("ascii", errors="ignore")
+        except Exception:
+            return raw.decode("utf-8", errors="ignore")
 
+    def _query_memory_block(self, count, ser=None):
+        """
+        Buffered run: arm หน่วยความจำของเครื่อง count ค่า, รอจนครบ แล้วดึงทั้งก้อน
+        คืน (rs เป็น mΩ, vs) -- ถูกเรียกจาก MeterWorker thread เท่านั้น
+        """
+        return read_memory_block(ser or self.ser, count)
 
     # ---------- export ----------
     def _toggle_auto_export(self):
@@ -810,13 +1123,9 @@ class App(tk.Tk):
 
         # helpers
         def one_r(i):
-            val = self.r_values[i]
-            if isinstance(val, (list, tuple)): val = val[0] if val else None
-            return val
+            return self.cells.get(i)[0]
         def one_v(i):
-            val = self.v_values[i]
-            if isinstance(val, (list, tuple)): val = val[0] if val else None
-            return val
+            return self.cells.get(i)[1]
 
         # format helpers
         def fr(x):  # R with 2 decimals
@@ -888,39 +1197,24 @@ class App(tk.Tk):
             messagebox.showerror("Export (.txt)", f"Save failed:\n{e}")
 
     def _result_lines(self):
-        rmin, rmax = self._r_bounds()
-        vmin, vmax = self._v_bounds()
-        lines = []
-        lines.append(f"Model\t{self.model_name.get().strip() or '-'}")
-        lines.append(f"Time\t{time.strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append("")
-        lines.append(f"R Set\t{self.r_set.get()} mΩ\tTol ±{self.r_tol.get()} mΩ\t(min={rmin}, max={rmax})")
-        lines.append(f"V Set\t{self.v_set.get()} V\tTol ±{self.v_tol.get()} V\t(min={vmin}, max={vmax})")
-        lines.append("")
-        lines.append("Cell\tR(mΩ)\tV(V)\tResult")
-        for i in range(self.num_points.get()):
-            r = self.r_values[i]
-            v = self.v_values[i]
-            if r is None or v is None:
-                lines.append(f"{i+1}\t\t\tN/A")
-            else:
-                res = LABEL_OK if self.flags[i] else LABEL_NG
-                lines.append(f"{i+1}\t{r:.6f}\t{v:.6f}\t{res}")
-        return lines
+        # _refresh_cells ตัดสินทีละ cell ด้วย limit ตอนที่วัด -> ถ้าแก้ Set/Tol กลางทาง flag จะปนกัน
+        # ตัดสินใหม่ทั้งหมดด้วย limit เดียวกับที่พิมพ์ในหัวไฟล์ (ตารางบนจอจะตรงกับไฟล์ด้วย)
+        self._refresh_rows()
+        return result_lines(self.model_name.get(), self.r_set.get(), self.r_tol.get(),
+                            self.v_set.get(), self.v_tol.get(),
+                            self.cells, self.num_points.get())
 
-    def _export_snapshot(self):
-        folder = self.save_folder.get().strip() or os.getcwd()
-        os.makedirs(folder, exist_ok=True)
-        ts = time.strftime("%Y%m%d_%H%M%S")
-        name = f"{self.model_name.get().strip() or 'model'}_{ts}.txt"
-        path = os.path.join(folder, name)
+    def _export_snapshot(self, suffix=""):
+        path = snapshot_path(self.save_folder.get(), self.model_name.get(), suffix)
+        t0 = time.perf_counter()
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write("\n".join(self._result_lines()))
+            write_lines(path, self._result_lines())
         except Exception as e:
             messagebox.showerror("Export", f"Auto export failed:\n{e}")
+        STAGES.add("export", time.perf_counter() - t0)
 
     def _manual_export(self):
+        from tkinter import filedialog
         folder = self.save_folder.get().strip() or os.getcwd()
         os.makedirs(folder, exist_ok=True)
         ts = time.strftime("%Y%m%d_%H%M%S")
@@ -940,11 +1234,142 @@ class App(tk.Tk):
         except Exception as e:
             messagebox.showerror("Export", f"Save failed:\n{e}")
 
+    # ---------- stage timings ----------
+    def _show_stage_timings(self):
+        """หน้าต่างตาราง latency ต่อ stage (อัปเดตทุก 1 วินาทีระหว่างเปิดอยู่)"""
+        win = getattr(self, "_timings_win", None)
+        if win is not None and win.winfo_exists():
+            win.lift(); return
+        win = self._timings_win = tk.Toplevel(self)
+        win.title("Stage Timings")
+        win.configure(bg=COLOR_BG)
+
+        cols = ("stage", "n", "mean", "p50", "p90", "p99", "max")
+        heads = ("Stage", "Count", "Mean ms", "p50 ms", "p90 ms", "p99 ms", "Max ms")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=14)
+        for c, h in zip(cols, heads):
+            tree.heading(c, text=h)
+            tree.column(c, width=(110 if c == "stage" else 80), anchor=("w" if c == "stage" else "e"))
+        tree.pack(fill="both", expand=True, padx=10, pady=(10,6))
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for s, n, mean, p50, p90, p99, mx in STAGES.summary():
+                tree.insert("", "end", values=(s, n, f"{mean*1e3:.4f}", f"{p50*1e3:.4f}",
+                                                f"{p90*1e3:.4f}", f"{p99*1e3:.4f}", f"{mx*1e3:.4f}"))
+            win.after(1000, refresh)
+
+        def reset():
+            STAGES.reset(); tree.delete(*tree.get_children())
+
+        btns = ttk.Frame(win, style="Card.TFrame"); btns.pack(fill="x", padx=10, pady=(0,10))
+        ttk.Button(btns, text="Reset", command=reset).pack(side="left")
+        ttk.Button(btns, text="Dump to File", command=self._dump_stage_timings).pack(side="left", padx=8)
+        refresh()
+
+    def _dump_stage_timings(self):
+        folder = self.save_folder.get().strip() or os.getcwd()
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"stage_timings_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+        try:
+            STAGES.dump(path)
+            messagebox.showinfo("Stage Timings", f"Saved to:\n{path}")
+        except Exception as e:
+            messagebox.showerror("Stage Timings", f"Save failed:\n{e}")
+
+    # ---------- transcript replay ----------
+    def _replay_transcript(self):
+        """
+        เล่น transcript ซ้ำผ่านเส้นทางเดียวกับการวัดจริง (_read_meter → _refresh_rows → export)
+        เร็วที่สุดเท่าที่ทำได้ ไม่รอเวลาจริง; ครบทุก cell = 1 pack → export แล้วเริ่ม cell แรกใหม่
+        """
+        if self._auto_running or any(s.pending is not None for s in self.meters):
+            return
+        from tkinter import filedialog
+        from transcript import ReplaySerial, replay_readings
+        folder = self.save_folder.get().strip() or os.getcwd()
+        path = filedialog.askopenfilename(title="Replay transcript", initialdir=folder,
+                                          filetypes=[("Serial transcript", "*.mrvt"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            ser = ReplaySerial(path)
+        except Exception as e:
+            messagebox.showerror("Replay", f"Cannot open transcript:\n{e}"); return
+        try:
+            assert int(self.num_points.get()) > 0
+        except Exception:
+            messagebox.showerror("Replay", "Cell Count in Setting is not a valid number."); return
+        got = self.cells.counts()[0]
+        if got and not messagebox.askyesno(
+                "Replay", f"Replay starts a new pack: the {got} measured cell(s) on screen will be cleared.\n"
+                          f"Export first if you need them. Continue?"):
+            return
+
+        # เหมือน Reset: จำนวน cell อาจถูกแก้ใน Setting แต่ยังไม่ Apply -> ต้อง sync ตาราง/combobox ด้วย
+        self._init_arrays()
+        self._sync_main()
+        n = len(self.cells)
+        idx = reads = errors = packs = 0
+        t_ui = t_export = 0.0
+        t0 = time.perf_counter()
+        for r, v, err in replay_readings(ser, self._read_meter):
+            reads += 1
+            if err is not None:   # timeout/รูปแบบเสียใน transcript: เหมือนหน้างาน อ่าน cell เดิมซ้ำ
+                errors += 1
+                continue
+            t1 = time.perf_counter()
+            self.cells.set(idx, r, v)
+            self.current_idx = idx
+            self._add_trend(r, v)
+            self._refresh_cells((idx,))
+            self._update_big_box()
+            idx += 1
+            if idx == n:
+                # ไม่ได้กลับเข้า mainloop ระหว่าง replay → วาดรวมครั้งเดียวต่อ pack
+                self._render.flush()
+                t2 = time.perf_counter(); t_ui += t2 - t1
+                packs += 1
+                self._export_snapshot(suffix=f"_replay{packs}")
+                t_export += time.perf_counter() - t2
+                idx = 0
+            else:
+                t_ui += time.perf_counter() - t1
+        t1 = time.perf_counter()
+        self._render.flush()
+        self.update_idletasks()
+        t_ui += time.perf_counter() - t1
+        dt = time.perf_counter() - t0
+        rate = reads / dt if dt else 0.0
+        messagebox.showinfo("Replay", f"{reads} reads ({errors} errors), {packs} packs exported\n"
+                                      f"{dt*1000:.0f} ms total, {rate:,.0f} reads/s\n"
+                                      f"parse {max(0.0, dt - t_ui - t_export)*1000:.0f} ms · "
+                                      f"rows/big box {t_ui*1000:.0f} ms · export {t_export*1000:.0f} ms")
+
     # ---------- misc ----------
     def _reset(self):
         self._auto_stop()
         self._init_arrays()
-        self._build_main()
+        self._sync_main()
+
+    def _sync_main(self):
+        """ทำให้หน้า Main ที่สร้างไว้แล้วตรงกับ arrays (หลัง reset / เปลี่ยนจำนวน cell) โดยไม่ทำลาย widget"""
+        n = len(self.cells)
+        self.point_combo.configure(values=[i+1 for i in range(n)])
+        self.point_combo.current(self.current_idx)
+        self.table.set_count(n)
+        self._refresh_limits_labels()
+        self._refresh_rows()
+        self._update_big_box()
+        self._scroll_row_into_view(self.current_idx)
+
+    def _on_close(self):
+        self._auto_stop()
+        self._close_meters()
+        self._render.cancel()
+        self.destroy()
 
 if __name__ == "__main__":
     App().mainloop()
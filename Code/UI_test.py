@@ -14,6 +14,8 @@ import os, sys, time, random
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+from meter_parse import parse_reply
+
 # ---------------- Theme ----------------
 COLOR_BG        = "#EAF6FF"
 COLOR_PANEL     = "#FFFFFF"
@@ -180,6 +182,12 @@ class App(tk.Tk):
         self.big_canvas = tk.Canvas(left, height=360, bg=COLOR_IDLE_BG,
                                     highlightthickness=1, highlightbackground=COLOR_BORDER)
         self.big_canvas.pack(fill="both", expand=True)
+        # text item เดียวตลอดอายุ canvas: ต่อ reading แค่เปลี่ยนข้อความ/สี, ย้ายตำแหน่งเมื่อ resize เท่านั้น
+        self._big_text = self.big_canvas.create_text(
+            int(self.big_canvas["width"]) / 2, int(self.big_canvas["height"]) / 2,
+            text="", fill=COLOR_IDLE_TEXT, font=("Segoe UI", 60, "bold"))
+        self._big_state = None
+        self.big_canvas.bind("<Configure>", self._place_big_text)
         self._draw_big_box()
 
         # --- right panel (fixed width) ---
@@ -258,6 +266,7 @@ class App(tk.Tk):
         # ====== จบส่วน Canvas + Scrollbar ======
 
         # rows
+        self._row_geom = None   # วัดใหม่เมื่อสร้างแถวใหม่
         self.row_widgets = []  # (lamp_label, r_var, r_entry, v_var, v_entry)
         for i in range(self.num_points.get()):
             rowf = ttk.Frame(self.points_frame, style="Card.TFrame")
@@ -534,13 +543,27 @@ class App(tk.Tk):
         widget.bind_all("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
         widget.bind_all("<Button-5>", lambda e: canvas.yview_scroll( 1, "units"))
 
+    def _row_geometry(self):
+        """(y0, pitch, h) ของแถวในตาราง -- วัดครั้งเดียวหลังสร้างแถว แล้วใช้เลขคณิตต่อ"""
+        if self._row_geom is None and self.row_widgets:
+            self.points_canvas.update_idletasks()
+            first = self.row_widgets[0][0].master      # lamp → rowf
+            y0, h = first.winfo_y(), first.winfo_height()
+            if h <= 1:
+                return None     # ยังไม่ได้วาง layout
+            if len(self.row_widgets) > 1:
+                pitch = self.row_widgets[1][0].master.winfo_y() - y0
+            else:
+                pitch = h + 2 * y0
+            self._row_geom = (y0, pitch, h)
+        return self._row_geom
+
     def _scroll_row_into_view(self, idx, margin=8):
         if not (0 <= idx < len(self.row_widgets)): return
-        self.points_canvas.update_idletasks()
-        rows = self.points_frame.winfo_children()
-        rowf = rows[idx]
-        y = rowf.winfo_y()
-        h = rowf.winfo_height()
+        geom = self._row_geometry()
+        if geom is None: return
+        y0, pitch, h = geom
+        y = y0 + idx * pitch
         top = self.points_canvas.canvasy(0)
         bottom = top + self.points_canvas.winfo_height()
         if y < top + margin:
@@ -549,12 +572,14 @@ class App(tk.Tk):
             new_top = (y + h + margin) - self.points_canvas.winfo_height()
         else:
             return
-        total = max(1, self.points_frame.winfo_height())
+        total = max(1, len(self.row_widgets) * pitch)
         self.points_canvas.yview_moveto(max(0, new_top)/total)
 
     # ---------- rendering ----------
+    def _place_big_text(self, e):
+        self.big_canvas.coords(self._big_text, e.width / 2, e.height / 2)
+
     def _draw_big_box(self):
-        self.big_canvas.delete("all")
         r = self.r_values[self.current_idx]
         v = self.v_values[self.current_idx]
         if r is None and v is None:
@@ -568,10 +593,11 @@ class App(tk.Tk):
             bg = COLOR_PASS_BG if is_pass else COLOR_FAIL_BG
             fg = COLOR_PASS_TEXT if is_pass else COLOR_FAIL_TEXT
             text = LABEL_OK if is_pass else LABEL_NG
+        if (bg, fg, text) == self._big_state:
+            return
+        self._big_state = (bg, fg, text)
         self.big_canvas.configure(bg=bg)
-        w = self.big_canvas.winfo_width()  or int(self.big_canvas["width"])
-        h = self.big_canvas.winfo_height() or int(self.big_canvas["height"])
-        self.big_canvas.create_text(w/2, h/2, text=text, fill=fg, font=("Segoe UI", 60, "bold"))
+        self.big_canvas.itemconfigure(self._big_text, text=text, fill=fg)
 
     def _refresh_rows(self):
         rmin, rmax = self._r_bounds()
@@ -681,20 +707,7 @@ class App(tk.Tk):
         แปลงสตริงจากเครื่อง:  +5.87263E-03,+3.09940E+00,+0
         คืนค่า (r_ohm, v_volt, status)  -- r_ohm เป็น 'โอห์ม' (ยังไม่คูณเป็น mΩ)
         """
-        s = (line or "").strip()
-        parts = [p.strip() for p in s.split(",")]
-        if len(parts) < 2:
-            raise ValueError(f"bad format: {s}")
-
-        r_ohm  = float(parts[0])
-        v_volt = float(parts[1])
-        status = None
-        if len(parts) >= 3:
-            try:
-                status = int(parts[2].replace("+", ""))
-            except Exception:
-                status = None
-        return r_ohm, v_volt, status
+        return parse_reply(line)
 
 
     def _query_fetc_once(self, line_ending=b"\r\n", timeout_ms=1500):
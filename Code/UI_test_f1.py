@@ -6,15 +6,18 @@ Resistance & Voltage Checker (Blue/White UI)
 - Active column is centered color block (Label)
 - R/V values centered; red text when out of spec
 - Manual / Auto measurement (simulated)
+- Redraws (rows, big box, current-cell highlight, scroll) coalesced to one per frame
 - Auto-export toggle (timestamped .txt to chosen folder; default cwd)
 - Auto export saves only AFTER all cells (when ON); Manual saves only when pressing Export
 """
 
 import os, sys, time
-import re
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+from meter_parse import parse_reply
+from render_sched import RenderScheduler
+
 # ---------------- Theme ----------------
 COLOR_BG        = "#EAF6FF"
 COLOR_PANEL     = "#FFFFFF"
@@ -96,6 +99,10 @@ class App(tk.Tk):
         self._auto_running = False
         self._auto_job = None
 
+        # วาดตาราง/กล่องใหญ่/ไฮไลต์/scroll รวมกันไม่เกินเฟรมละครั้ง
+        self._render = RenderScheduler(self)
+        self._scroll_target = (0, 8)
+
         self._setup_styles()
         self._build_ui()
 
@@ -192,6 +199,12 @@ class App(tk.Tk):
         self.big_canvas = tk.Canvas(left, height=360, bg=COLOR_IDLE_BG,
                                     highlightthickness=1, highlightbackground=COLOR_BORDER)
         self.big_canvas.pack(fill="both", expand=True)
+        # text item เดียวตลอดอายุ canvas: ต่อ reading แค่เปลี่ยนข้อความ/สี, ย้ายตำแหน่งเมื่อ resize เท่านั้น
+        self._big_text = self.big_canvas.create_text(
+            int(self.big_canvas["width"]) / 2, int(self.big_canvas["height"]) / 2,
+            text="", fill=COLOR_IDLE_TEXT, font=("Segoe UI", 60, "bold"))
+        self._big_state = None
+        self.big_canvas.bind("<Configure>", self._place_big_text)
         self._draw_big_box()
 
         # --- right panel (fixed width) ---
@@ -269,6 +282,8 @@ class App(tk.Tk):
         # ====== จบส่วน Canvas + Scrollbar ======
 
         # rows
+        self._row_geom = None   # วัดใหม่เมื่อสร้างแถวใหม่
+        self._hl_idx = None     # แถวที่ไฮไลต์อยู่ (None = ยังไม่ได้จัดสไตล์แถวชุดนี้)
         self.row_widgets = []  # (rowf, lamp, r_var, r_ent, v_var, v_ent, cell_lbl)
         for i in range(self.num_points.get()):
             rowf = ttk.Frame(self.points_frame, style="Card.TFrame")
@@ -417,6 +432,7 @@ class App(tk.Tk):
     def _show_next_cell_popup(self):
                 """แสดงป็อปอัป 'Please measure the next cell' แล้วปิดเองใน 1 วินาที"""
                 owner = self.winfo_toplevel()
+                self._render.flush()   # ให้เห็นไฮไลต์ย้ายแล้วก่อนป็อปอัปขึ้น
 
                 # ปิดป็อปอัปเก่าถ้ามี
                 try:
@@ -548,6 +564,9 @@ class App(tk.Tk):
         self.btn_auto_stop.state(["!disabled" if is_auto else "disabled"])
 
     def _update_current_indicators(self):
+        self._render.request("indicators", self._render_current_indicators)
+
+    def _render_current_indicators(self):
         # อัปเดตข้อความข้างปุ่ม
         try:
             self.lbl_current_cell.config(
@@ -557,27 +576,40 @@ class App(tk.Tk):
             pass
 
         # ไฮไลต์แถวปัจจุบัน + ทำกรอบที่ lamp + ทำตัวหนาที่ label "Cell X"
-        for i, (rowf, lamp, r_var, r_ent, v_var, v_ent, cell_lbl) in enumerate(self.row_widgets):
-            if i == self.current_idx:
-                rowf.configure(style="RowActive.TFrame")
-                try:
-                    lamp.configure(highlightthickness=2, highlightbackground="#4A90E2")
-                except Exception:
-                    pass
-                try:
-                    cell_lbl.configure(font=("Segoe UI", 10, "bold"))
-                except Exception:
-                    pass
-            else:
-                rowf.configure(style="Card.TFrame")
-                try:
-                    lamp.configure(highlightthickness=0)
-                except Exception:
-                    pass
-                try:
-                    cell_lbl.configure(font=("Segoe UI", 10, "normal"))
-                except Exception:
-                    pass
+        # จัดสไตล์ทุกแถวครั้งแรกหลังสร้างแถว; หลังจากนั้นแตะแค่แถวเดิมกับแถวใหม่
+        cur = self.current_idx
+        if self._hl_idx is None:
+            for i in range(len(self.row_widgets)):
+                self._style_row(i, i == cur)
+        elif self._hl_idx != cur:
+            self._style_row(self._hl_idx, False)
+            self._style_row(cur, True)
+        self._hl_idx = cur
+
+    def _style_row(self, i, active):
+        if not (0 <= i < len(self.row_widgets)):
+            return
+        rowf, lamp, r_var, r_ent, v_var, v_ent, cell_lbl = self.row_widgets[i]
+        if active:
+            rowf.configure(style="RowActive.TFrame")
+            try:
+                lamp.configure(highlightthickness=2, highlightbackground="#4A90E2")
+            except Exception:
+                pass
+            try:
+                cell_lbl.configure(font=("Segoe UI", 10, "bold"))
+            except Exception:
+                pass
+        else:
+            rowf.configure(style="Card.TFrame")
+            try:
+                lamp.configure(highlightthickness=0)
+            except Exception:
+                pass
+            try:
+                cell_lbl.configure(font=("Segoe UI", 10, "normal"))
+            except Exception:
+                pass
 
     def _browse_folder(self):
         path = filedialog.askdirectory(title="Choose folder to save")
@@ -613,13 +645,32 @@ class App(tk.Tk):
         widget.bind_all("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
         widget.bind_all("<Button-5>", lambda e: canvas.yview_scroll( 1, "units"))
 
+    def _row_geometry(self):
+        """(y0, pitch, h) ของแถวในตาราง -- วัดครั้งเดียวหลังสร้างแถว แล้วใช้เลขคณิตต่อ"""
+        if self._row_geom is None and self.row_widgets:
+            self.points_canvas.update_idletasks()
+            first = self.row_widgets[0][0]
+            y0, h = first.winfo_y(), first.winfo_height()
+            if h <= 1:
+                return None     # ยังไม่ได้วาง layout
+            if len(self.row_widgets) > 1:
+                pitch = self.row_widgets[1][0].winfo_y() - y0
+            else:
+                pitch = h + 2 * y0
+            self._row_geom = (y0, pitch, h)
+        return self._row_geom
+
     def _scroll_row_into_view(self, idx, margin=8):
+        self._scroll_target = (idx, margin)
+        self._render.request("scroll", self._render_scroll)
+
+    def _render_scroll(self):
+        idx, margin = self._scroll_target
         if not (0 <= idx < len(self.row_widgets)): return
-        self.points_canvas.update_idletasks()
-        rows = self.points_frame.winfo_children()
-        rowf = rows[idx]
-        y = rowf.winfo_y()
-        h = rowf.winfo_height()
+        geom = self._row_geometry()
+        if geom is None: return
+        y0, pitch, h = geom
+        y = y0 + idx * pitch
         top = self.points_canvas.canvasy(0)
         bottom = top + self.points_canvas.winfo_height()
         if y < top + margin:
@@ -628,14 +679,18 @@ class App(tk.Tk):
             new_top = (y + h + margin) - self.points_canvas.winfo_height()
         else:
             return
-        total = max(1, self.points_frame.winfo_height())
+        total = max(1, len(self.row_widgets) * pitch)
         self.points_canvas.yview_moveto(max(0, new_top)/total)
 
     # ---------- rendering ----------
-    def _draw_big_box(self):
-        self.big_canvas.delete("all")
-        r = self.r_values[self.current_idx]
-        v = self.v_values[self.current_idx]
+    def _place_big_text(self, e):
+        self.big_canvas.coords(self._big_text, e.width / 2, e.height / 2)
+
+    def _draw_big_box(self, idx=None):
+        if idx is None:
+            idx = self.current_idx
+        r = self.r_values[idx]
+        v = self.v_values[idx]
         if r is None and v is None:
             bg, fg, text = COLOR_IDLE_BG, COLOR_IDLE_TEXT, ""
         else:
@@ -647,12 +702,16 @@ class App(tk.Tk):
             bg = COLOR_PASS_BG if is_pass else COLOR_FAIL_BG
             fg = COLOR_PASS_TEXT if is_pass else COLOR_FAIL_TEXT
             text = LABEL_OK if is_pass else LABEL_NG
+        if (bg, fg, text) == self._big_state:
+            return
+        self._big_state = (bg, fg, text)
         self.big_canvas.configure(bg=bg)
-        w = self.big_canvas.winfo_width()  or int(self.big_canvas["width"])
-        h = self.big_canvas.winfo_height() or int(self.big_canvas["height"])
-        self.big_canvas.create_text(w/2, h/2, text=text, fill=fg, font=("Segoe UI", 60, "bold"))
+        self.big_canvas.itemconfigure(self._big_text, text=text, fill=fg)
 
     def _refresh_rows(self):
+        self._render.request("rows", self._render_rows)
+
+    def _render_rows(self):
         rmin, rmax = self._r_bounds()
         vmin, vmax = self._v_bounds()
         for i,(rowf, lamp, r_var, r_ent, v_var, v_ent, cell_lbl) in enumerate(self.row_widgets):
@@ -677,11 +736,17 @@ class App(tk.Tk):
             v_ent.configure(state="readonly")
 
     def _update_big_box(self):
-        r = self.r_values[self.current_idx]
-        v = self.v_values[self.current_idx]
+        # จำ cell ตอนขอ: ก่อนถึงรอบวาด current_idx อาจเลื่อนไป cell ถัดไป (auto/manual) แล้ว
+        self._big_idx = self.current_idx
+        self._render.request("big_box", self._render_big_box)
+
+    def _render_big_box(self):
+        idx = self._big_idx if 0 <= self._big_idx < len(self.r_values) else self.current_idx
+        r = self.r_values[idx]
+        v = self.v_values[idx]
         self.lbl_ohm.config(text=("— mΩ" if r is None else f"{r:.2f} mΩ"))   # <-- 2 decimal
         self.lbl_volt.config(text=("— V"  if v is None else f"{v:.4f} V"))   # <-- 4 decimal
-        self._draw_big_box()
+        self._draw_big_box(idx)
 
     def _read_meter(self):
         """
@@ -715,19 +780,7 @@ class App(tk.Tk):
                 raise TimeoutError("No response received from the device.")
 
             # แยกและแปลงเป็นตัวเลข
-            parts = re.split(r"[,\s]+", raw)
-            nums = []
-            for p in parts:
-                try:
-                    nums.append(float(p))
-                except:
-                    pass
-
-            if len(nums) < 2:
-                raise ValueError(f"Invalid data format: {raw!r}")
-
-            r_ohm = float(nums[0])
-            v_volt = float(nums[1])
+            r_ohm, v_volt, _status = parse_reply(raw)
 
             # แปลง R (Ω) -> mΩ สำหรับแสดงใน GUI
             r_milliohm = r_ohm * 1000.0
@@ -827,20 +880,7 @@ class App(tk.Tk):
         แปลงสตริงจากเครื่อง:  +5.87263E-03,+3.09940E+00,+0
         คืนค่า (r_ohm, v_volt, status)  -- r_ohm เป็น 'โอห์ม' (ยังไม่คูณเป็น mΩ)
         """
-        s = (line or "").strip()
-        parts = [p.strip() for p in s.split(",")]
-        if len(parts) < 2:
-            raise ValueError(f"bad format: {s}")
-
-        r_ohm  = float(parts[0])
-        v_volt = float(parts[1])
-        status = None
-        if len(parts) >= 3:
-            try:
-                status = int(parts[2].replace("+", ""))
-            except Exception:
-                status = None
-        return r_ohm, v_volt, status
+        return parse_reply(line)
 
 
     def _query_fetc_once(self, line_ending=b"\r\n", timeout_ms=1500):
@@ -970,6 +1010,7 @@ class App(tk.Tk):
             messagebox.showerror("Export (.txt)", f"Save failed:\n{e}")
 
     def _result_lines(self):
+        self._render.flush()   # flags ถูกคำนวณตอนวาดตาราง
         rmin, rmax = self._r_bounds()
         vmin, vmax = self._v_bounds()
         lines = []
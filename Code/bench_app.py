@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end benchmark: the real App measurement loop against a simulated meter
+- Cell counts 20 / 200 / 999 (999 = Cell Count spinbox maximum)
+- measure: Measure-one per cell through worker → result queue → _poll_results →
+  _apply_result → _refresh_rows / big box (the manual/auto path, after() timing included)
+- sweep:   whole pack through the scanner sweep path
+- render:  _refresh_rows, _draw_big_box, _build_main, _reset on their own (idle tasks flushed)
+- Reports cells/s, per-cell latency p50/p90/p99 and peak Python memory (tracemalloc,
+  separate pass so it does not slow the timed runs)
+- --save FILE.json keeps the numbers; --compare FILE.json exits 1 if anything got
+  slower by more than --tolerance (default 25 %)
+
+Needs a display (Tk).  Usage:
+  python bench_app.py [--cells 20,200,999] [--port sim://scanner] [--save base.json] [--compare base.json]
+"""
+
+import argparse, json, sys, time, tracemalloc
+
+import tkinter as tk
+from tkinter import messagebox
+
+import UI
+
+RENDER_REPEAT = {20: 50, 200: 10, 999: 3}
+
+
+def _quiet_dialogs():
+    # popup ระหว่าง benchmark จะบล็อก loop -- ให้เป็น no-op
+    for name in ("showinfo", "showwarning", "showerror"):
+        setattr(messagebox, name, lambda *a, **k: None)
+
+
+def _pct(sorted_vals, q):
+    if not sorted_vals:
+        return float("nan")
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+def _timeit(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def _make_app(n, port):
+    app = UI.App()
+    app.num_points.set(n)
+    app._init_arrays()
+    app._build_main()
+    app.com_port.set(port)
+    app._connect_serial()
+    if not app.meters:
+        raise RuntimeError(f"cannot connect to {port}")
+    app.update()
+    return app
+
+
+def _wait_idle(app, timeout=60.0):
+    end = time.perf_counter() + timeout
+    while any(s.pending is not None for s in app.meters):
+        app.update()
+        if time.perf_counter() > end:
+            raise TimeoutError("meter did not answer")
+
+
+def bench_measure(app):
+    """วัดทีละ cell ตามเส้นทางปกติ -- latency ต่อ cell = กดขอ → ค่าขึ้นตาราง"""
+    n = len(app.cells)
+    lat = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        app.current_idx = i
+        t1 = time.perf_counter()
+        app._measure_one()
+        _wait_idle(app)
+        lat.append(time.perf_counter() - t1)
+    total = time.perf_counter() - t0
+    lat.sort()
+    return {"cells_per_s": n / total, "p50_ms": _pct(lat, 0.5) * 1e3,
+            "p90_ms": _pct(lat, 0.9) * 1e3, "p99_ms": _pct(lat, 0.99) * 1e3}
+
+
+def bench_sweep(app):
+    n = len(app.cells)
+    t0 = time.perf_counter()
+    app._sweep()
+    _wait_idle(app)
+    app.update_idletasks()
+    total = time.perf_counter() - t0
+    return {"cells_per_s": n / total, "total_ms": total * 1e3}
+
+
+def bench_render(app):
+    n = len(app.cells)
+    k = RENDER_REPEAT.get(n, 5)
+
+    def rows():
+        app._refresh_rows(); app._render.flush(); app.update_idletasks()
+
+    def big():
+        # _draw_big_box ข้ามการ configure ถ้าสี/ข้อความเท่าเดิม -> ล้างทุกรอบ ให้จับเวลาการวาดจริง
+        app._big_state = None
+        app._draw_big_box(); app.update_idletasks()
+
+    def build():
+        app._build_main(); app.update_idletasks()
+
+    def reset():
+        app._reset(); app._render.flush(); app.update_idletasks()
+
+    return {"refresh_rows_ms": _timeit(rows, k) * 1e3,
+            "draw_big_box_ms": _timeit(big, 50) * 1e3,
+            "build_main_ms": _timeit(build, max(1, k // 3)) * 1e3,
+            "reset_ms": _timeit(reset, k) * 1e3}
+
+
+def peak_memory(n, port):
+    tracemalloc.start()
+    app = _make_app(n, port)
+    try:
+        app._sweep()
+        _wait_idle(app)
+        app._refresh_rows()
+        app._render.flush()
+        app.update_idletasks()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+        app._on_close()
+
+
+def run(cells, port):
+    results = {}
+    for n in cells:
+        app = _make_app(n, port)
+        try:
+            r = {"measure": bench_measure(app), "sweep": bench_sweep(app), "render": bench_render(app)}
+        finally:
+            app._on_close()
+        r["peak_kib"] = peak_memory(n, port)
+        results[str(n)] = r
+        m, s, g = r["measure"], r["sweep"], r["render"]
+        print(f"{n:>4} cells | measure {m['cells_per_s']:8.1f} cells/s  p50 {m['p50_ms']:6.1f}  "
+              f"p90 {m['p90_ms']:6.1f}  p99 {m['p99_ms']:6.1f} ms | sweep {s['cells_per_s']:8.1f} cells/s | "
+              f"rows {g['refresh_rows_ms']:7.2f}  big {g['draw_big_box_ms']:5.2f}  "
+              f"build {g['build_main_ms']:8.1f}  reset {g['reset_ms']:7.2f} ms | peak {r['peak_kib']:8.0f} KiB", flush=True)
+    return results
+
+
+# ค่าที่ "มากขึ้น = แย่ลง" / "น้อยลง = แย่ลง"
+_LOWER_IS_WORSE = ("cells_per_s",)
+
+
+def compare(base, new, tolerance):
+    worse = []
+    for n, groups in new.items():
+        for g, vals in groups.items():
+            old = base.get(n, {}).get(g)
+            if old is None:
+                continue
+            if not isinstance(vals, dict):
+                vals, old = {g: vals}, {g: old}
+            for key, v in vals.items():
+                o = old.get(key)
+                if not o:
+                    continue
+                ratio = (o / v) if key in _LOWER_IS_WORSE else (v / o)
+                if ratio > 1 + tolerance:
+                    worse.append(f"{n} cells {g}.{key}: {o:.3g} -> {v:.3g} ({(ratio - 1) * 100:+.0f} %)")
+    return worse
+
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end App benchmark")
+    ap.add_argument("--cells", default="20,200,999")
+    ap.add_argument("--port", default=UI.SIM_SCANNER_PORT, help="simulated meter port (sim://scanner, sim://pty?...)")
+    ap.add_argument("--save", help="write results to this JSON file")
+    ap.add_argument("--compare", help="baseline JSON; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    a = ap.parse_args()
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f"bench_app needs a display: {e}", file=sys.stderr)
+        return 2
+    _quiet_dialogs()
+
+    results = run([int(x) for x in a.cells.split(",") if x.strip()], a.port)
+    if a.save:
+        with open(a.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    if a.compare:
+        with open(a.compare, encoding="utf-8") as f:
+            worse = compare(json.load(f), results, a.tolerance)
+        for w in worse:
+            print("REGRESSION", w)
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
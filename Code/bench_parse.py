@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark: meter_parse vs the parsers it replaced
+- single reply: old _read_meter (re.split + try/float) / old _parse_meter_line / parse_reply
+- block of N triples: old per-line loop / parse_block / parse_block_columns
+
+Usage:  python bench_parse.py [block_readings]
+"""
+
+import re, sys, timeit
+
+from meter_parse import parse_reply, parse_block, parse_block_columns
+
+REPLY = b"+5.87263E-03,+3.09940E+00,+0\r\n"
+
+
+# ---- the code as it was before meter_parse ----
+def old_read_meter(raw):
+    raw = raw.decode("ascii", "ignore").strip()
+    parts = re.split(r"[,\s]+", raw)
+    nums = []
+    for p in parts:
+        try:
+            nums.append(float(p))
+        except:
+            pass
+    if len(nums) < 2:
+        raise ValueError(f"Invalid data format: {raw!r}")
+    return nums[0] * 1000.0, nums[1]
+
+
+def old_parse_meter_line(line):
+    s = (line or "").strip()
+    parts = [p.strip() for p in s.split(",")]
+    if len(parts) < 2:
+        raise ValueError(f"bad format: {s}")
+    r_ohm  = float(parts[0])
+    v_volt = float(parts[1])
+    status = None
+    if len(parts) >= 3:
+        try:
+            status = int(parts[2].replace("+", ""))
+        except Exception:
+            status = None
+    return r_ohm, v_volt, status
+
+
+def old_block(buf):
+    # ก่อนหน้านี้ไม่มี block parser: แยกบรรทัดแล้วใช้ตัวแปลงของ _read_meter ทีละค่า
+    return [old_read_meter(line) for line in buf.splitlines() if line.strip()]
+
+
+def _bench(label, fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    print(f"  {label:<28} {best/number*1e6:9.2f} µs/call")
+    return best / number
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    line = REPLY.decode("ascii")
+    block_lines = REPLY * n                                   # one reading per line
+    block_flat = b",".join(REPLY.strip() for _ in range(n))   # :MEM:DATA? style
+
+    assert parse_reply(REPLY)[:2] == old_parse_meter_line(line)[:2]
+    assert len(parse_block(block_lines)) == len(parse_block(block_flat)) == len(old_block(block_lines)) == n
+
+    print("single reply")
+    t_old = _bench("old _read_meter", lambda: old_read_meter(REPLY), 20000)
+    _bench("old _parse_meter_line", lambda: old_parse_meter_line(line), 20000)
+    t_new = _bench("parse_reply", lambda: parse_reply(REPLY), 20000)
+    print(f"  speed-up vs _read_meter: {t_old/t_new:.1f}x")
+
+    print(f"block of {n} readings")
+    t_old = _bench("old per-line loop", lambda: old_block(block_lines), 20)
+    _bench("parse_block (lines)", lambda: parse_block(block_lines), 20)
+    _bench("parse_block (flat)", lambda: parse_block(block_flat), 20)
+    t_new = _bench("parse_block_columns (flat)", lambda: parse_block_columns(block_flat, 1000.0), 20)
+    print(f"  speed-up vs per-line loop: {t_old/t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
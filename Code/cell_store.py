@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Compact per-pack measurement store (no Tk in here)
+- R / V in array('d'), NaN = not measured: 8 bytes per value in one contiguous
+  buffer instead of a list slot + float object (or None) per cell
+- PASS flags as a bitmap (bytearray, 1 bit per cell)
+- set(i, r, v) / get(i) -> (r or None, v or None) at the edges, so callers
+  keep their "None = not measured" checks
+- evaluate(r_lim, v_lim[, indices]): PASS bits straight from the buffers
+  (NaN fails every comparison, so unmeasured cells come out NOT PASS)
+- counts(): (measured, passed)
+"""
+
+from array import array
+
+NAN = float("nan")
+
+
+class CellStore:
+    def __init__(self, n):
+        self.n = int(n)
+        self.r = array("d", [NAN]) * self.n
+        self.v = array("d", [NAN]) * self.n
+        self.bits = bytearray((self.n + 7) // 8)
+
+    def __len__(self):
+        return self.n
+
+    def set(self, i, r, v):
+        self.r[i] = NAN if r is None else r
+        self.v[i] = NAN if v is None else v
+
+    def get(self, i):
+        r, v = self.r[i], self.v[i]
+        return (None if r != r else r), (None if v != v else v)   # NaN != NaN
+
+    def measured(self, i):
+        r, v = self.r[i], self.v[i]
+        return r == r and v == v
+
+    def passed(self, i):
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def evaluate(self, r_lim, v_lim, indices=None):
+        rlo, rhi = r_lim
+        vlo, vhi = v_lim
+        r, v, bits = self.r, self.v, self.bits
+        if indices is None:
+            # ทั้งก้อน: เริ่ม bitmap ใหม่แล้วตั้งเฉพาะ bit ที่ผ่าน
+            bits[:] = bytes(len(bits))
+            for i, (x, y) in enumerate(zip(r, v)):
+                if rlo <= x <= rhi and vlo <= y <= vhi:
+                    bits[i >> 3] |= 1 << (i & 7)
+            return
+        for i in indices:
+            m = 1 << (i & 7)
+            if rlo <= r[i] <= rhi and vlo <= v[i] <= vhi:
+                bits[i >> 3] |= m
+            else:
+                bits[i >> 3] &= ~m & 0xFF
+
+    def counts(self):
+        measured = sum(1 for x, y in zip(self.r, self.v) if x == x and y == y)
+        return measured, bin(int.from_bytes(self.bits, "little")).count("1")
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Cell table for the Main tab (Tk, no measurement logic in here)
+- VirtualRowTable: the Cell / Active / R / V rows inside a Canvas, but only a
+  pool of about one screenful of row widgets exists; rows are recycled as the
+  Canvas scrolls (cell i is always shown by pool row i % pool size, so a scroll
+  by one row re-binds one row). Build time and memory do not depend on the
+  cell count.
+- The App supplies cell_fn(i) -> (r_text, v_text, lamp_bg, r_fg, v_fg) and
+  on_click(i); the table only calls it for rows that are on screen
+- CanvasGrid: the same table drawn as text/rectangle items on the Canvas itself,
+  one fixed set of item IDs per cell; updating a cell is an itemconfigure of its
+  colors and text, no widgets or StringVars at all (packs of thousands of cells)
+- Both engines have the same interface (set_count / refresh / scroll_into_view /
+  destroy) and arithmetic row geometry (row i starts at i * row_h), so scrolling
+  a cell into view needs no widget queries
+"""
+
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+
+ROW_PAD_Y = 4      # เท่ากับ pady ของแถวแบบเดิม
+POOL_SPARE = 2     # แถวสำรองเผื่อแถวที่โผล่มาครึ่งแถวบน/ล่าง
+
+
+class _PoolRow:
+    __slots__ = ("frame", "win", "label", "lamp", "r_var", "r_ent", "v_var", "v_ent", "idx", "view")
+
+
+class _RowGeometry:
+    """ส่วนที่ทั้งสอง engine ใช้ร่วมกัน: แถว i อยู่ที่ y = i * row_h"""
+
+    def __init__(self, canvas, vbar, count, cell_fn, on_click, cols, left_pad):
+        self.canvas = canvas
+        self.vbar = vbar
+        self.count = count
+        self.cell_fn = cell_fn
+        self.on_click = on_click
+        self.cols = cols
+        self.left_pad = left_pad
+        self.row_h = 0
+
+    def scroll_into_view(self, idx, margin=8):
+        if not (0 <= idx < self.count):
+            return
+        h = self.row_h
+        y = idx * h
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        # ตำแหน่งเลื่อนถูกปัดเป็นทวีคูณของ row_h (yscrollincrement) → ปัดไปทางที่ยังเห็นทั้งแถว
+        if y < top + margin:
+            new_top = (max(0, y - margin) // h) * h
+        elif y + h > top + height - margin:
+            new_top = -(-(y + h + margin - height) // h) * h
+        else:
+            return
+        self.canvas.yview_moveto(max(0, new_top) / max(1, self.count * h))
+
+    def _set_scrollregion(self):
+        w = max(1, self.canvas.winfo_width())
+        height = self.canvas.winfo_height()
+        # เติมท้ายให้ (ความสูงทั้งหมด - ความสูงจอ) เป็นทวีคูณของ row_h → เลื่อนสุดแล้วเห็นแถวสุดท้ายเต็มแถว
+        total = self.count * self.row_h
+        total += (self.row_h - height % self.row_h) % self.row_h if height > 1 else 0
+        self.canvas.configure(scrollregion=(0, 0, w, total))
+
+    def _clamp_view(self):
+        if self.canvas.canvasy(0) >= self.count * self.row_h:   # เดิมเลื่อนไปไกลกว่าจำนวนแถวใหม่
+            self.canvas.yview_moveto(0)
+
+    def _unbind_canvas(self):
+        self.canvas.unbind("<Configure>")
+        self.canvas.configure(yscrollcommand="")
+
+
+class VirtualRowTable(_RowGeometry):
+    def __init__(self, canvas, vbar, count, cell_fn, on_click, cols, left_pad=6):
+        super().__init__(canvas, vbar, count, cell_fn, on_click, cols, left_pad)
+        self.pool = []
+
+        # วัดความสูงแถวจริงจากแถวแรก (ขึ้นกับฟอนต์/DPI ของเครื่อง)
+        first = self._new_row()
+        first.frame.update_idletasks()
+        self.row_h = first.frame.winfo_reqheight() + 2 * ROW_PAD_Y
+
+        canvas.configure(yscrollcommand=self._on_yview, yscrollincrement=self.row_h)
+        canvas.bind("<Configure>", self._on_configure)
+        self._set_scrollregion()
+        self._ensure_pool()
+        self._layout()
+
+    # ---- public ----
+    def set_count(self, n):
+        self.count = n
+        for row in self.pool:
+            if row.idx is not None and row.idx >= n:
+                self._hide(row)
+        self._set_scrollregion()
+        self._clamp_view()
+        self._layout()
+
+    def refresh(self, indices=None):
+        """วาดใหม่เฉพาะแถวที่อยู่บนจอ (indices=None = ทุกแถวที่มองเห็น)"""
+        k = len(self.pool)
+        if indices is None:
+            rows = [r for r in self.pool if r.idx is not None]
+        else:
+            rows = [self.pool[i % k] for i in indices]
+            rows = [r for r, i in zip(rows, indices) if r.idx == i]
+        for row in rows:
+            self._apply(row, self.cell_fn(row.idx))
+
+    def destroy(self):
+        self._unbind_canvas()
+        for row in self.pool:
+            self.canvas.delete(row.win)
+            row.frame.destroy()
+        self.pool = []
+
+    # ---- pool ----
+    def _new_row(self):
+        row = _PoolRow()
+        c = self.canvas
+        rowf = row.frame = ttk.Frame(c, style="Card.TFrame")
+        for col, w in enumerate(self.cols):
+            rowf.grid_columnconfigure(col, minsize=w, weight=0)
+
+        row.label = ttk.Label(rowf, text="")
+        row.label.grid(row=0, column=0, sticky="w", padx=(self.left_pad, 2))
+        row.label.bind("<Button-1>", lambda e, row=row: row.idx is not None and self.on_click(row.idx))
+
+        row.lamp = tk.Label(rowf, width=8, height=1, relief="solid", bd=1)
+        row.lamp.grid(row=0, column=1, sticky="ew", padx=4)
+
+        row.r_var = tk.StringVar(value="")
+        row.r_ent = tk.Entry(rowf, textvariable=row.r_var, width=20, justify="center", relief="solid", bd=1)
+        row.r_ent.configure(state="readonly", readonlybackground="white")
+        row.r_ent.grid(row=0, column=2, sticky="ew", padx=4, ipady=2)
+
+        row.v_var = tk.StringVar(value="")
+        row.v_ent = tk.Entry(rowf, textvariable=row.v_var, width=20, justify="center", relief="solid", bd=1)
+        row.v_ent.configure(state="readonly", readonlybackground="white")
+        row.v_ent.grid(row=0, column=3, sticky="ew", padx=4, ipady=2)
+
+        # ล้อเมาส์บนแถวก็เลื่อนตาราง ("break" กันไม่ให้ bind_all ของ App เลื่อนซ้ำอีกรอบ)
+        def on_wheel(e):
+            c.yview_scroll(-1 if e.delta > 0 else 1, "units")
+            return "break"
+        for w in (rowf, row.label, row.lamp, row.r_ent, row.v_ent):
+            w.bind("<MouseWheel>", on_wheel)
+
+        row.win = c.create_window(0, 0, window=rowf, anchor="nw", state="hidden",
+                                  width=max(1, c.winfo_width()))
+        row.idx = None
+        row.view = None
+        self.pool.append(row)
+        return row
+
+    def _ensure_pool(self):
+        height = self.canvas.winfo_height()
+        if height <= 1:
+            height = int(self.canvas["height"])
+        want = height // self.row_h + POOL_SPARE
+        if want <= len(self.pool):
+            return False
+        while len(self.pool) < want:
+            self._new_row()
+        for row in self.pool:   # จำนวนแถวใน pool เปลี่ยน → การจับคู่ i % k เปลี่ยนทั้งหมด
+            self._hide(row)
+        return True
+
+    def _hide(self, row):
+        row.idx = None
+        self.canvas.itemconfigure(row.win, state="hidden")
+
+    # ---- layout ----
+    def _on_configure(self, e):
+        for row in self.pool:
+            self.canvas.itemconfigure(row.win, width=e.width)
+        self._ensure_pool()
+        self._set_scrollregion()
+        self._layout()
+
+    def _on_yview(self, first, last):
+        if self.vbar is not None:
+            self.vbar.set(first, last)
+        self._layout()
+
+    def _layout(self):
+        k = len(self.pool)
+        top = int(self.canvas.canvasy(0)) // self.row_h
+        lo, hi = max(0, top), min(self.count, top + k)
+        for i in range(lo, hi):
+            row = self.pool[i % k]
+            if row.idx != i:
+                self._bind(row, i)
+        for row in self.pool:
+            if row.idx is not None and not (lo <= row.idx < hi):
+                self._hide(row)
+
+    def _bind(self, row, i):
+        row.idx = i
+        self.canvas.coords(row.win, 0, i * self.row_h + ROW_PAD_Y)
+        row.label.configure(text=f"Cell {i+1}")
+        self._apply(row, self.cell_fn(i))
+        self.canvas.itemconfigure(row.win, state="normal")
+
+    def _apply(self, row, view):
+        old = row.view
+        if view == old:
+            return
+        r_text, v_text, lamp_bg, r_fg, v_fg = view
+        if old is None or r_text != old[0]: row.r_var.set(r_text)
+        if old is None or v_text != old[1]: row.v_var.set(v_text)
+        if old is None or lamp_bg != old[2]: row.lamp.configure(bg=lamp_bg)
+        if old is None or r_fg != old[3]: row.r_ent.configure(fg=r_fg)
+        if old is None or v_fg != old[4]: row.v_ent.configure(fg=v_fg)
+        row.view = view
+
+
+class CanvasGrid(_RowGeometry):
+    """
+    Whole table drawn on the Canvas: per cell a label text, a lamp rectangle and
+    an R and a V box with centered text. Item IDs are kept per cell, so an update
+    is itemconfigure only; a count change creates/deletes just the difference.
+    """
+
+    def __init__(self, canvas, vbar, count, cell_fn, on_click, cols, left_pad=6):
+        super().__init__(canvas, vbar, 0, cell_fn, on_click, cols, left_pad)
+        self.font = tkfont.nametofont("TkDefaultFont")
+        self.row_h = self.font.metrics("linespace") + 16
+        x = [0]
+        for w in cols:
+            x.append(x[-1] + w)
+        self._x = x
+        self._items = []   # ต่อ cell: (label, lamp, r_box, r_text, v_box, v_text)
+        self._views = []
+
+        canvas.configure(yscrollcommand=(vbar.set if vbar is not None else ""), yscrollincrement=self.row_h)
+        canvas.bind("<Configure>", lambda e: self._set_scrollregion())
+        canvas.tag_bind("cellgrid", "<Button-1>", self._on_click)
+        self.set_count(count)
+
+    # ---- public ----
+    def set_count(self, n):
+        c = self.canvas
+        while len(self._items) > n:
+            for item in self._items.pop():
+                c.delete(item)
+            self._views.pop()
+        for i in range(len(self._items), n):
+            self._items.append(self._create_cell(i))
+            self._views.append(None)
+            self._apply(i, self.cell_fn(i))
+        self.count = n
+        self._set_scrollregion()
+        self._clamp_view()
+
+    def refresh(self, indices=None):
+        for i in (range(self.count) if indices is None else indices):
+            self._apply(i, self.cell_fn(i))
+
+    def destroy(self):
+        self._unbind_canvas()
+        self.canvas.tag_unbind("cellgrid", "<Button-1>")
+        self.canvas.delete("cellgrid")
+        self._items = []
+        self._views = []
+
+    # ---- drawing ----
+    def _create_cell(self, i):
+        c, x, h, f = self.canvas, self._x, self.row_h, self.font
+        y0 = i * h + ROW_PAD_Y
+        y1 = (i + 1) * h - ROW_PAD_Y
+        ym = (y0 + y1) / 2
+        tags = ("cellgrid",)
+        label = c.create_text(x[0] + self.left_pad, ym, text=f"Cell {i+1}", anchor="w", font=f, tags=tags)
+        lamp = c.create_rectangle(x[1] + 4, y0, x[2] - 4, y1, outline="black", tags=tags)
+        r_box = c.create_rectangle(x[2] + 4, y0, x[3] - 4, y1, outline="black", fill="white", tags=tags)
+        r_txt = c.create_text((x[2] + x[3]) / 2, ym, text="", font=f, tags=tags)
+        v_box = c.create_rectangle(x[3] + 4, y0, x[4] - 4, y1, outline="black", fill="white", tags=tags)
+        v_txt = c.create_text((x[3] + x[4]) / 2, ym, text="", font=f, tags=tags)
+        return label, lamp, r_box, r_txt, v_box, v_txt
+
+    def _apply(self, i, view):
+        old = self._views[i]
+        if view == old:
+            return
+        c = self.canvas
+        _label, lamp, _r_box, r_txt, _v_box, v_txt = self._items[i]
+        r_text, v_text, lamp_bg, r_fg, v_fg = view
+        if old is None or r_text != old[0] or r_fg != old[3]: c.itemconfigure(r_txt, text=r_text, fill=r_fg)
+        if old is None or v_text != old[1] or v_fg != old[4]: c.itemconfigure(v_txt, text=v_text, fill=v_fg)
+        if old is None or lamp_bg != old[2]: c.itemconfigure(lamp, fill=lamp_bg)
+        self._views[i] = view
+
+    def _on_click(self, e):
+        idx = int(self.canvas.canvasy(e.y)) // self.row_h
+        if 0 <= idx < self.count:
+            self.on_click(idx)
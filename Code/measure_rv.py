@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Headless runner: measure a pack without Tk (unattended stations)
+- Same serial stack (meter_io: SerialSession reconnect/retry, adaptive deadline,
+  read_fetc / sweep_readings / read_memory_block), same PASS rule and the same
+  snapshot .txt as the App's auto export (results.py)
+- --mode single   : one FETC? per cell, --interval ms between cells (probe move)
+         sweep    : scanner channels 1..N in batched commands
+         buffered : meter memory, one block download
+- Prints one line per cell as it goes; --timings FILE dumps the stage histograms
+- Exit code: 0 = all cells PASS, 1 = at least one NOT PASS, 2 = meter/port error
+
+Usage (from the Code folder):
+  python -m measure_rv run --port COM3 --cells 20 --rset 10 --rtol 0.5 --vset 5 --vtol 0.1
+  python -m measure_rv run --port sim://scanner --cells 200 --mode sweep ...
+"""
+
+import argparse, sys, threading, time
+
+from meter_io import SerialSession, read_fetc, sweep_readings, read_memory_block, open_port
+from results import limits, result_lines, snapshot_path, write_lines, LABEL_OK, LABEL_NG
+from cell_store import CellStore
+from stage_timer import STAGES
+
+EXIT_PASS, EXIT_FAIL, EXIT_ERROR = 0, 1, 2
+
+
+def _measure(session, mode, n, interval_s, stop_evt, on_reading):
+    """on_reading(idx, r, v) ทีละ cell ตามลำดับ -- error ของเครื่อง/พอร์ตส่งต่อเป็น exception"""
+    if mode == "single":
+        for i in range(n):
+            if i and interval_s > 0:
+                time.sleep(interval_s)
+            on_reading(i, *session.call(read_fetc, stop_evt))
+    elif mode == "sweep":
+        done = [0]
+
+        def run(ser):   # พอร์ตหลุดกลางทาง -> session เปิดใหม่แล้ววัดต่อจาก cell ที่ค้าง
+            for _ch, r, v in sweep_readings(ser, range(done[0] + 1, n + 1)):
+                on_reading(done[0], r, v)
+                done[0] += 1
+        session.call(run, stop_evt, timed=False)
+    else:
+        rs, vs = session.call(lambda ser: read_memory_block(ser, n), stop_evt, timed=False)
+        for i, (r, v) in enumerate(zip(rs, vs)):
+            on_reading(i, r, v)
+
+
+def run(a):
+    n = a.cells
+    rb, vb = limits(a.rset, a.rtol), limits(a.vset, a.vtol)
+    cells = CellStore(n)
+    sims = {}
+    session = SerialSession(a.port, a.baud, lambda p, b: open_port(p, b, sims))
+    stop_evt = threading.Event()
+    code = EXIT_PASS
+
+    def on_reading(i, r, v):
+        cells.set(i, r, v)
+        cells.evaluate(rb, vb, (i,))
+        print(f"Cell {i+1:>4}/{n}  R {r:10.4f} mΩ  V {v:9.5f} V  {LABEL_OK if cells.passed(i) else LABEL_NG}",
+              flush=True)
+
+    t0 = time.perf_counter()
+    try:
+        session.open()
+        print(f"{a.port} @ {a.baud} bps · {n} cells · mode {a.mode}", flush=True)
+        _measure(session, a.mode, n, a.interval / 1000.0, stop_evt, on_reading)
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        code = EXIT_ERROR
+    except Exception as e:
+        print(f"Meter error ({a.port}): {e}", file=sys.stderr)
+        code = EXIT_ERROR
+    finally:
+        stop_evt.set()
+        session.close()
+        for sim in sims.values():
+            sim.stop()
+    dt = time.perf_counter() - t0
+
+    got, n_pass = cells.counts()
+    if code == EXIT_PASS and n_pass < n:
+        code = EXIT_FAIL
+    print(f"{got}/{n} measured · {n_pass} {LABEL_OK} · {got - n_pass} {LABEL_NG} · {dt:.2f} s "
+          f"· {session.summary()}", flush=True)
+
+    # export เหมือน auto export ของ App: เฉพาะเมื่อวัดครบทุก cell
+    if not a.no_export and got == n:
+        path = snapshot_path(a.folder, a.model)
+        write_lines(path, result_lines(a.model, a.rset, a.rtol, a.vset, a.vtol, cells))
+        print(f"Saved {path}")
+    if a.timings:
+        STAGES.dump(a.timings)
+    print("RESULT", {EXIT_PASS: LABEL_OK, EXIT_FAIL: LABEL_NG}.get(code, "ERROR"), flush=True)
+    return code
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="measure_rv", description="Measure R/V without the GUI")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("run", help="measure one pack and export the result")
+    p.add_argument("--port", required=True, help="COM3, /dev/ttyUSB0, sim://scanner, sim://pty?...")
+    p.add_argument("--baud", type=int, default=9600)
+    p.add_argument("--cells", type=int, required=True)
+    p.add_argument("--rset", type=float, required=True, help="R set point, mΩ")
+    p.add_argument("--rtol", type=float, required=True, help="R tolerance ±, mΩ")
+    p.add_argument("--vset", type=float, required=True, help="V set point, V")
+    p.add_argument("--vtol", type=float, required=True, help="V tolerance ±, V")
+    p.add_argument("--mode", choices=("single", "sweep", "buffered"), default="single")
+    p.add_argument("--interval", type=int, default=0, help="ms between cells in single mode")
+    p.add_argument("--model", default="")
+    p.add_argument("--folder", default="", help="export folder (default: current folder)")
+    p.add_argument("--no-export", action="store_true")
+    p.add_argument("--timings", help="write stage latency histograms to this file")
+    a = ap.parse_args(argv)
+    if a.cells < 1:
+        ap.error("--cells must be >= 1")
+    return run(a)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,670 @@
+# -*- coding: utf-8 -*-
+"""
+Meter serial I/O (no Tk in here)
+- read_fetc(): one FETC? round trip -> (R in mΩ, V in volts)
+- MeterWorker: background thread that owns the serial port, takes cell
+  requests from the GUI and pushes (idx, r, v, timestamp, err) into a
+  bounded result queue that the GUI drains with after()
+- Stream mode: meter is put in continuous/internal trigger once; each request
+  sends its own FETC? at once (no reset/flush per read, several can be in
+  flight, replies matched in order) and nothing is sent while idle
+- MeterSlot / split_cells(): several meters on several COM ports, each one
+  measuring its own contiguous slice of the cell array concurrently
+- sweep_readings(): relay/multiplexer scanner in front of the meter; channel
+  select + READ? commands are sent in batches and replies read back in bulk
+- read_memory_block(): buffered run -- meter scans channels 1..N (scan list,
+  immediate trigger) into its own memory, then the whole block is downloaded
+  and parsed in one transfer
+- SerialSession: persistent port handle -- reopens a dropped USB-serial
+  adapter in the background with backoff, retries the failed operation once
+  and keeps ok/error/reconnect counters and reply latency
+- LatencyTracker: reply-latency distribution per (port, baud); the read
+  deadline is p99 x 1.5 + a few character times instead of a fixed 1 s, and
+  after a few timeouts in a row the meter is treated as silent (fast-fail)
+- All reply parsing goes through meter_parse
+- read_fetc() / stream parse feed stage_timer.STAGES (reset, write, readline, parse)
+- open_port(): port name -> serial object (real port, sim://scanner, sim://pty?...)
+"""
+
+import time
+import queue, threading
+from collections import deque
+
+from meter_parse import parse_reply, parse_block_columns
+from stage_timer import STAGES
+
+RESULT_QUEUE_SIZE = 64
+
+# -------- Session / reconnect --------
+RECONNECT_MIN_S     = 0.2    # first backoff step
+RECONNECT_MAX_S     = 5.0    # backoff cap
+RECONNECT_GIVE_UP_S = 30.0   # report the error to the GUI after this long (next request tries again)
+
+# -------- Adaptive read deadline --------
+READ_TIMEOUT_DEFAULT = 1.0    # s, until enough replies have been timed (and for sweep/buffered)
+READ_TIMEOUT_MIN     = 0.05
+READ_TIMEOUT_MAX     = 2.0
+LAT_WINDOW           = 200    # latest replies kept per (port, baud)
+LAT_MIN_SAMPLES      = 20
+LAT_P99_FACTOR       = 1.5
+LAT_MARGIN_CHARS     = 10     # + time to receive this many characters at the baud rate
+LAT_MARGIN_S         = 0.02
+SILENT_AFTER         = 3      # timeouts in a row -> meter treated as not answering
+MAX_REPLY_BYTES      = 200
+
+# -------- Stream (continuous trigger) mode --------
+STREAM_SETUP_CMDS   = (b":TRIG:SOUR IMM", b":INIT:CONT ON")
+STREAM_POLL_CMD     = b"FETC?"
+STREAM_READ_TIMEOUT = 0.2   # s, per readline() so stop() stays responsive
+
+# -------- Scanner (multiplexer) sweep --------
+SCAN_SELECT_CMD = b":ROUT:CLOS (@%d)"   # % channel (1-based)
+SCAN_READ_CMD   = b":READ?"             # trigger + fetch after the relay settles
+SWEEP_BATCH     = 10                    # commands per write (keep meter input buffer small)
+
+# -------- Buffered run (meter internal memory) --------
+MEM_SETUP_CMDS = (b":MEM:CLE", b":MEM:STAT ON", b":TRIG:SOUR IMM")
+MEM_SCAN_CMD  = b":ROUT:SCAN (@%d:%d)"   # first, last channel: one reading per scanner channel
+MEM_ARM_CMD   = b":TRIG:COUN %d;:INIT"   # % reading count
+MEM_COUNT_CMD = b":MEM:COUN?"
+MEM_DATA_CMD  = b":MEM:DATA?"
+MEM_POLL_S    = 0.05   # s between :MEM:COUN? polls while the run is in progress
+MEM_WAIT_PER_READING = 0.5   # s budget per reading before the run is declared stuck
+
+# -------- Port names --------
+SIM_SCANNER_PORT = "sim://scanner"   # scripted stand-in scanner (scanner_sim.py)
+SIM_PTY_PORT     = "sim://pty"       # virtual meter on a real pty (meter_sim.py)
+
+_STOP = object()
+
+
+def read_fetc(ser):
+    """
+    อ่านค่าจากเครื่องวัดผ่าน Serial
+    โพรโทคอลตัวอย่าง: ส่ง 'FETC?' แล้วเครื่องตอบแบบ
+    '+5.87263E-03,+3.09940E+00,+0'
+    - ตัวแรก = R (โอห์ม) -> แปลงเป็น mΩ สำหรับ GUI
+    - ตัวที่สอง = V (โวลต์)
+    """
+    if not ser or not getattr(ser, "is_open", True):
+        raise RuntimeError("Serial not connected")
+
+    clock = time.perf_counter
+    t0 = clock()
+    # เคลียร์บัฟเฟอร์ (กันค้าง)
+    if hasattr(ser, "reset_input_buffer"):
+        ser.reset_input_buffer()
+    if hasattr(ser, "reset_output_buffer"):
+        ser.reset_output_buffer()
+    t1 = clock(); STAGES.add("reset", t1 - t0)
+
+    # ส่งคำสั่งอ่าน (ปรับ \r\n ตามเครื่องของคุณ)
+    ser.write(b"FETC?\r\n")
+    ser.flush()
+    t2 = clock(); STAGES.add("write", t2 - t1)
+
+    # อ่าน 1 บรรทัด (ser.timeout ถูกตั้งจาก LatencyTracker โดย SerialSession)
+    raw = ser.readline()
+    if raw and not raw.endswith(b"\n"):
+        # หมดเวลากลางบรรทัด: อ่านต่อให้จบบรรทัด
+        raw += ser.read_until(b"\n", MAX_REPLY_BYTES)
+    t3 = clock(); STAGES.add("readline", t3 - t2)
+    if not raw.strip():
+        raise TimeoutError("No response received from the device.")
+    out = parse_reading(raw)
+    STAGES.add("parse", clock() - t3)
+    return out
+
+
+def parse_reading(raw):
+    """bytes/str '+5.87263E-03,+3.09940E+00,+0' -> (R mΩ, V)"""
+    r_ohm, v_volt, _status = parse_reply(raw)
+    # แปลง R (Ω) -> mΩ สำหรับแสดงใน GUI
+    return r_ohm * 1000.0, v_volt
+
+
+def sweep_readings(ser, channels, batch=SWEEP_BATCH, line_ending=b"\r\n"):
+    """
+    วัดหลายช่องของ scanner ต่อเนื่อง: ส่งคำสั่ง 'เลือกช่อง;READ?' ทีละ batch
+    แล้วอ่านคำตอบทั้งก้อน -- yield (channel, R mΩ, V) ทีละช่องตามลำดับ
+    """
+    if not ser or not getattr(ser, "is_open", True):
+        raise RuntimeError("Serial not connected")
+    if hasattr(ser, "reset_input_buffer"):
+        ser.reset_input_buffer()
+
+    channels = list(channels)
+    for i in range(0, len(channels), batch):
+        chunk = channels[i:i+batch]
+        ser.write(b"".join((SCAN_SELECT_CMD % ch) + b";" + SCAN_READ_CMD + line_ending for ch in chunk))
+        ser.flush()
+        for ch in chunk:
+            raw = ser.readline()
+            if not raw.strip():
+                raise TimeoutError(f"No response for scanner channel {ch}.")
+            r, v = parse_reading(raw)
+            yield ch, r, v
+
+
+def read_memory_block(ser, count, first_channel=1, line_ending=b"\r\n", poll_s=MEM_POLL_S):
+    """
+    Buffered run: สั่งเครื่องสแกน channel first_channel.. (count ช่อง, channel ละ 1 ค่า)
+    เก็บในหน่วยความจำของเครื่อง, รอจนครบ, แล้วดึงทั้งก้อนด้วย :MEM:DATA? ครั้งเดียว
+    -> (rs เป็น mΩ, vs) ยาว count
+    """
+    if not ser or not getattr(ser, "is_open", True):
+        raise RuntimeError("Serial not connected")
+    if hasattr(ser, "reset_input_buffer"):
+        ser.reset_input_buffer()
+
+    # arm: trigger source + scan list ต้องตั้งก่อน ไม่งั้นเครื่องวัดซ้ำ channel เดิม count ครั้ง
+    cmds = MEM_SETUP_CMDS + (MEM_SCAN_CMD % (first_channel, first_channel + count - 1), MEM_ARM_CMD % count)
+    ser.write(b"".join(c + line_ending for c in cmds))
+    ser.flush()
+
+    # wait for completion
+    deadline = time.monotonic() + 2.0 + count * MEM_WAIT_PER_READING
+    while True:
+        ser.write(MEM_COUNT_CMD + line_ending)
+        raw = ser.readline().strip()
+        try:
+            if raw and int(float(raw)) >= count:
+                break
+        except ValueError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Buffered run did not complete ({raw.decode('ascii', 'ignore') or 'no reply'}/{count}).")
+        time.sleep(poll_s)
+
+    # download: คำตอบอาจมาบรรทัดเดียวยาวๆ หรือหลายบรรทัด → อ่านจน parse ได้ครบ count แถว
+    # (หยุดตามแถวที่ parse ได้จริง ไม่เดาจำนวน field ต่อแถว)
+    ser.write(MEM_DATA_CMD + line_ending)
+    ser.flush()
+    chunks, n_vals = [], 0
+    rs = vs = ()
+    while len(rs) < count:
+        raw = ser.readline().strip().strip(b",")
+        if not raw:
+            raise TimeoutError(f"Buffered run: memory download timed out ({len(rs)}/{count} readings).")
+        chunks.append(raw)
+        n_vals += len(raw.replace(b",", b" ").split())
+        if n_vals >= 2 * count:   # แถวละอย่างน้อย R,V -> น้อยกว่านี้ยังไม่มีทางครบ ไม่ต้อง parse
+            rs, vs, _sts = parse_block_columns(b",".join(chunks), r_scale=1000.0)
+    # ก้อนที่ได้ต้องพอดี count แถว: ไม่มี reading ค้างครึ่งแถวหรือเกินมา (ข้อมูลเพี้ยน = run ล้ม ไม่ใส่ค่าผิด cell)
+    rs, vs, _sts = parse_block_columns(b",".join(chunks), r_scale=1000.0, partial=False)
+    if len(rs) != count:
+        raise ValueError(f"Buffered run: memory block has {len(rs)} readings, expected {count}.")
+    return rs, vs
+
+
+def configure_stream(ser, cmds=STREAM_SETUP_CMDS, line_ending=b"\r\n"):
+    """ตั้งเครื่องเป็น continuous / internal trigger ครั้งเดียวตอนเชื่อมต่อ"""
+    if hasattr(ser, "reset_input_buffer"):
+        ser.reset_input_buffer()
+    for c in cmds:
+        ser.write(c + line_ending)
+    ser.flush()
+
+
+def is_link_error(e):
+    """พอร์ตหลุด / อะแดปเตอร์ถูกถอด (ไม่ใช่เครื่องไม่ตอบหรือข้อมูลเพี้ยน)"""
+    # serial.SerialException เป็น OSError; TimeoutError ก็เป็น OSError แต่หมายถึงเครื่องไม่ตอบ
+    return isinstance(e, OSError) and not isinstance(e, TimeoutError)
+
+
+class LatencyTracker:
+    """Reply latencies of one port at one baud rate -> read deadline for the next reply"""
+
+    def __init__(self, baudrate):
+        self.samples = deque(maxlen=LAT_WINDOW)
+        self.char_s = 10.0 / max(1, int(baudrate))   # 8N1 = 10 bits per character
+        self.timeouts_in_row = 0
+        self._pct = None   # cached (p50, p99), cleared on every new sample
+
+    def add(self, dt):
+        self.samples.append(dt)
+        self.timeouts_in_row = 0
+        self._pct = None
+
+    def timed_out(self):
+        self.timeouts_in_row += 1
+
+    @property
+    def silent(self):
+        return self.timeouts_in_row >= SILENT_AFTER
+
+    def percentiles(self):
+        if self._pct is None:
+            xs = sorted(self.samples)
+            if not xs:
+                return None, None
+            self._pct = (xs[len(xs) // 2], xs[min(len(xs) - 1, int(len(xs) * 0.99))])
+        return self._pct
+
+    def deadline(self):
+        """ถ้ายังมีตัวอย่างน้อยใช้ 1 s เหมือนเดิม; เครื่องเงียบ → ใช้ deadline สั้น (probe) เพื่อ fail เร็ว"""
+        margin = LAT_MARGIN_CHARS * self.char_s + LAT_MARGIN_S
+        if len(self.samples) < LAT_MIN_SAMPLES:
+            t = READ_TIMEOUT_DEFAULT
+        else:
+            t = self.percentiles()[1] * LAT_P99_FACTOR + margin
+        if self.silent:
+            p50 = self.percentiles()[0]
+            t = min(t, 2 * p50 + margin if p50 is not None else 0.2)
+        return min(READ_TIMEOUT_MAX, max(READ_TIMEOUT_MIN, t))
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def latency_tracker(port, baudrate):
+    """tracker ของ (port, baud) -- ใช้ตัวเดิมต่อแม้ reconnect / connect ใหม่"""
+    with _trackers_lock:
+        key = (port, int(baudrate))
+        if key not in _trackers:
+            _trackers[key] = LatencyTracker(baudrate)
+        return _trackers[key]
+
+
+class SerialSession:
+    """
+    One port that stays "connected" across cable glitches.
+    opener(port, baudrate) -> serial-like object; called again on every reopen.
+    Only the worker thread uses it while the worker runs; the GUI reads counters.
+    """
+
+    def __init__(self, port, baudrate, opener):
+        self.port = port
+        self.baudrate = baudrate
+        self.opener = opener
+        self.tracker = latency_tracker(port, baudrate)
+        self.ser = None
+        self.state = "closed"     # connected / reconnecting / lost / closed
+        self.n_ok = 0
+        self.n_err = 0
+        self.n_retries = 0
+        self.n_reconnects = 0
+        self.consecutive_err = 0
+        self.last_error = None
+        self.lat_last = 0.0       # s, timed operations only (single reads)
+        self.lat_max = 0.0
+        self._lat_sum = 0.0
+        self._lat_n = 0
+
+    # ---- port handle ----
+    def open(self):
+        self.ser = self.opener(self.port, self.baudrate)
+        self.state = "connected"
+        return self.ser
+
+    def close(self):
+        self._close_port()
+        self.state = "closed"
+
+    def drop(self):
+        """ทิ้ง handle ที่เสียแล้ว; ครั้งถัดไปจะเปิดใหม่"""
+        self._close_port()
+        self.state = "reconnecting"
+
+    def _close_port(self):
+        ser, self.ser = self.ser, None
+        try:
+            if ser: ser.close()
+        except Exception:
+            pass
+
+    def reconnect(self, stop_evt, give_up_s=RECONNECT_GIVE_UP_S):
+        """เปิดพอร์ตใหม่แบบ backoff (0.2, 0.4, ... สูงสุด 5 s) จนสำเร็จ / หมดเวลา / ถูก stop"""
+        self._close_port()
+        self.state = "reconnecting"
+        delay = RECONNECT_MIN_S
+        deadline = time.monotonic() + give_up_s
+        while not stop_evt.is_set():
+            try:
+                self.open()
+                self.n_reconnects += 1
+                return True
+            except Exception as e:
+                self.last_error = e
+            if time.monotonic() + delay > deadline:
+                break
+            stop_evt.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_S)
+        self.state = "lost"
+        return False
+
+    def ensure_open(self, stop_evt):
+        if self.ser is None and not self.reconnect(stop_evt):
+            raise self.last_error or ConnectionError(f"{self.port} is not available.")
+        return self.ser
+
+    # ---- operations ----
+    def call(self, fn, stop_evt, retries=1, timed=True):
+        """
+        fn(ser) พร้อมนับสถิติ; ถ้าพอร์ตหลุดจะเปิดใหม่แล้วลองซ้ำ (retries ครั้ง)
+        เครื่องไม่ตอบ (timeout) ก็ลองซ้ำได้ แต่ไม่ต้องเปิดพอร์ตใหม่ -- ยกเว้นเครื่องเงียบไปแล้ว (fail เร็ว)
+        timed=True: deadline จาก tracker และเวลาที่ใช้ถูกเก็บเข้า tracker
+        """
+        attempt = 0
+        while True:
+            ser = self.ensure_open(stop_evt)
+            if not timed:
+                t = READ_TIMEOUT_DEFAULT
+            elif attempt:
+                t = READ_TIMEOUT_MAX   # ลองซ้ำด้วย deadline เต็ม เผื่อเครื่องแค่ช้าลง (ค่านี้จะดัน p99 ขึ้นเอง)
+            else:
+                t = self.tracker.deadline()
+            self._set_timeout(ser, t)
+            t0 = time.perf_counter()
+            try:
+                out = fn(ser)
+            except Exception as e:
+                self.record_error(e)
+                if is_link_error(e):
+                    self.drop()
+                elif timed and isinstance(e, TimeoutError):
+                    self.tracker.timed_out()
+                    if self.tracker.silent:
+                        raise
+                if attempt >= retries or stop_evt.is_set():
+                    raise
+                attempt += 1
+                self.n_retries += 1
+                continue
+            dt = time.perf_counter() - t0
+            # เกิน deadline = มี timeout ระหว่างทาง (เช่นบรรทัดขาด) ไม่ใช่ latency จริงของเครื่อง
+            self.record_ok(dt if timed and dt <= t else None)
+            return out
+
+    @staticmethod
+    def _set_timeout(ser, t):
+        # ตั้งเฉพาะตอนค่าเปลี่ยน (pyserial ตั้งค่าพอร์ตใหม่ทุกครั้งที่กำหนด timeout)
+        if getattr(ser, "timeout", t) != t:
+            ser.timeout = t
+
+    def record_ok(self, dt=None):
+        self.n_ok += 1
+        self.consecutive_err = 0
+        if dt is not None:
+            self.tracker.add(dt)
+            self.lat_last = dt
+            self.lat_max = max(self.lat_max, dt)
+            self._lat_sum += dt
+            self._lat_n += 1
+
+    def record_error(self, e):
+        self.n_err += 1
+        self.consecutive_err += 1
+        self.last_error = e
+
+    @property
+    def lat_avg(self):
+        return self._lat_sum / self._lat_n if self._lat_n else 0.0
+
+    def summary(self):
+        state = "not answering" if self.state == "connected" and self.tracker.silent else self.state
+        _p50, p99 = self.tracker.percentiles()
+        p99 = f"{p99*1000:.0f} ms" if p99 is not None else "-"
+        text = (f"{state} · ok {self.n_ok} · err {self.n_err} · reconnects {self.n_reconnects}"
+                f" · avg {self.lat_avg*1000:.0f} ms · p99 {p99} · deadline {self.tracker.deadline()*1000:.0f} ms")
+        if self.consecutive_err and self.last_error is not None:
+            text += f" · last error: {self.last_error}"
+        return text
+
+
+class MeterWorker(threading.Thread):
+    """
+    Acquisition thread: the only code that touches the serial port while it runs.
+    GUI calls request(idx); the reading comes back on .results as
+    (idx, r_milliohm, v_volt, timestamp, err) -- err is None on success.
+    read_fn(ser) / block_fn(ser, count) run through the SerialSession, so a
+    dropped adapter is reopened and the operation retried once.
+    """
+
+    def __init__(self, session, read_fn=None, maxsize=RESULT_QUEUE_SIZE, stream=False, block_fn=None):
+        super().__init__(name=f"MeterWorker-{session.port}", daemon=True)
+        self.session = session
+        self.read_fn = read_fn or read_fetc
+        self.block_fn = block_fn or read_memory_block
+        self.stream = stream
+        self.requests = queue.Queue()
+        self.results = queue.Queue(maxsize=maxsize)
+        self._stop_evt = threading.Event()
+
+    def request(self, idx):
+        # เวลาที่ขอถูกบันทึกตอนนี้ (stream mode ใช้ตัดสินว่าค่าไหนใหม่พอ)
+        self.requests.put(("read", idx, time.time()))
+
+    def request_sweep(self, cells, first_channel=1):
+        """cells[k] ถูกวัดที่ scanner channel first_channel+k; ได้ผลทีละ cell ทาง .results"""
+        self.requests.put(("sweep", list(cells), first_channel))
+
+    def request_buffered(self, cells):
+        """buffered run ของ cells ทั้งหมด -> ได้ผลเป็นรายการเดียว (cells, rs, vs, ts, err)"""
+        self.requests.put(("buffered", list(cells)))
+
+    def stop(self, timeout=2.0):
+        self._stop_evt.set()
+        self.requests.put(_STOP)
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        if self.stream:
+            self._run_stream()
+            return
+        while not self._stop_evt.is_set():
+            req = self.requests.get()
+            if req is _STOP:
+                break
+            kind, idx, *args = req
+            if kind == "sweep":
+                self._sweep(idx, *args)
+                continue
+            if kind == "buffered":
+                self._buffered(idx)
+                continue
+            try:
+                r, v = self.session.call(self.read_fn, self._stop_evt)
+                item = (idx, r, v, time.time(), None)
+            except Exception as e:
+                item = (idx, None, None, time.time(), e)
+            self._put(item)
+
+    def _sweep(self, cells, first_channel):
+        # หยุดที่ error แรก: ส่ง error ของ cell นั้นแล้วจบ sweep
+        # ถ้าพอร์ตหลุดกลางทาง session จะเปิดใหม่แล้ววัดต่อจาก cell ที่ค้าง
+        done = [0]
+
+        def run(ser):
+            rest = cells[done[0]:]
+            first = first_channel + done[0]
+            for _ch, r, v in sweep_readings(ser, range(first, first + len(rest))):
+                self._put((cells[done[0]], r, v, time.time(), None))
+                done[0] += 1
+
+        try:
+            self.session.call(run, self._stop_evt, timed=False)
+        except Exception as e:
+            self._put((cells[min(done[0], len(cells) - 1)], None, None, time.time(), e))
+
+    def _buffered(self, cells):
+        try:
+            rs, vs = self.session.call(lambda ser: self.block_fn(ser, len(cells)), self._stop_evt, timed=False)
+            item = (cells, rs, vs, time.time(), None)
+        except Exception as e:
+            item = (cells, None, None, time.time(), e)
+        self._put(item)
+
+    def _run_stream(self, line_ending=b"\r\n"):
+        """
+        Continuous mode: every request sends its own FETC? as soon as it arrives,
+        so several queries can be in flight and replies come back pipelined.
+        Replies are matched to queries in order; a reply only answers a request
+        if its query was sent after the request (value belongs to the probe
+        position at request time). Nothing is sent while no request is waiting.
+        A dropped port is reopened and the meter set up for streaming again.
+        """
+        pending = deque()   # (idx, t_request)
+        while not self._stop_evt.is_set():
+            try:
+                ser = self.session.ensure_open(self._stop_evt)
+                self._stream_loop(ser, pending, line_ending)
+                return   # stop()
+            except Exception as e:
+                self.session.record_error(e)
+                if is_link_error(e):
+                    self.session.drop()
+                # คำขอที่ค้างอยู่ตอบเป็น error ไปก่อน แล้ววนไปเปิดพอร์ตใหม่
+                self._fail_pending(pending, e)
+                self._stop_evt.wait(RECONNECT_MIN_S)
+
+    def _stream_loop(self, ser, pending, line_ending):
+        poll = STREAM_POLL_CMD + line_ending
+        configure_stream(ser, line_ending=line_ending)
+        ser.timeout = STREAM_READ_TIMEOUT
+        inflight = deque()   # เวลาส่งของ FETC? ที่ยังไม่ได้คำตอบ ตามลำดับ (เครื่องตอบตามลำดับคำสั่ง)
+        t_rx = 0.0           # เวลาที่ได้คำตอบล่าสุด (latency ไม่นับเวลาที่ต่อคิวหลังคำตอบก่อนหน้า)
+
+        while not self._stop_evt.is_set():
+            # ว่าง (ไม่มีคำขอ ไม่มี query ค้าง): รอคำขอที่คิว ไม่ส่งอะไรให้เครื่อง
+            n_before = len(pending)
+            if not self._take_requests(pending, wait=0 if (pending or inflight) else STREAM_READ_TIMEOUT):
+                return
+            # คำขอใหม่ -> FETC? ของมันเองทันที ไม่ต้องรอคำตอบของ query ที่ค้างอยู่
+            n_new = len(pending) - n_before
+            if n_new:
+                ser.write(poll * n_new)
+                t_sent = time.time()
+                inflight.extend([t_sent] * n_new)
+            if not inflight:
+                continue
+
+            raw = ser.readline()
+            now = time.time()
+
+            if not raw.strip():
+                # เงียบไป STREAM_READ_TIMEOUT: ถือว่า query/คำตอบที่ค้างหายหมด
+                # ตัดคำขอที่รอนานเกิน deadline, ล้าง buffer แล้วถามใหม่ให้คำขอที่เหลือ
+                req_timeout = self.session.tracker.deadline() + STREAM_READ_TIMEOUT
+                while pending and now - pending[0][1] > req_timeout:
+                    idx, _ = pending.popleft()
+                    err = TimeoutError("No response received from the device.")
+                    self.session.record_error(err)
+                    self.session.tracker.timed_out()
+                    self._put((idx, None, None, now, err))
+                inflight.clear()
+                if pending:
+                    if hasattr(ser, "reset_input_buffer"):
+                        ser.reset_input_buffer()
+                    ser.write(poll * len(pending))
+                    inflight.extend([time.time()] * len(pending))
+                continue
+
+            t_query = inflight.popleft()
+            if not pending or pending[0][1] > t_query:
+                continue   # คำตอบของ query ที่ส่งก่อนมีคำขอ (หลังถามใหม่) → ข้าม
+            idx, _ = pending.popleft()
+            try:
+                t0 = time.perf_counter()
+                r, v = parse_reading(raw)
+                STAGES.add("parse", time.perf_counter() - t0)
+                self.session.record_ok(now - max(t_query, t_rx))
+                item = (idx, r, v, now, None)
+            except Exception as e:
+                self.session.record_error(e)
+                item = (idx, None, None, now, e)
+            t_rx = now
+            self._put(item)
+
+    def _take_requests(self, pending, wait=0):
+        """ย้ายคำขอจากคิวเข้า pending (รอคำขอแรกได้ไม่เกิน wait วินาที); คืน False ถ้าเจอ stop"""
+        while True:
+            try:
+                req = self.requests.get(timeout=wait) if wait else self.requests.get_nowait()
+            except queue.Empty:
+                return True
+            wait = 0
+            if req is _STOP:
+                return False
+            kind, arg, *rest = req
+            if kind != "read":   # sweep / buffered run ใช้กับ stream mode ไม่ได้
+                self._put((arg if kind == "buffered" else arg[0], None, None, time.time(),
+                           RuntimeError(f"{kind.capitalize()} is not available in stream mode.")))
+                continue
+            pending.append((arg, rest[0]))
+
+    def _fail_pending(self, pending, err):
+        if not self._take_requests(pending):
+            self._stop_evt.set()
+        while pending:
+            idx, _ = pending.popleft()
+            self._put((idx, None, None, time.time(), err))
+
+    def _put(self, item):
+        # คิวมีขนาดจำกัด: ถ้า GUI ยังไม่ดึงออก ให้รอ (แต่ยังหยุดได้)
+        while not self._stop_evt.is_set():
+            try:
+                self.results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def open_port(port, baud, pty_sims):
+    """
+    เปิดพอร์ตตามชื่อ: 'sim://pty?...' = meter จำลองบน pty (สร้างครั้งแรกแล้วเก็บใน
+    pty_sims ให้ reconnect ใช้ตัวเดิม), 'sim://...' = scanner จำลอง, อื่นๆ = pyserial
+    """
+    if port.startswith(SIM_PTY_PORT):
+        sim = pty_sims.get(port)
+        if sim is None:
+            from meter_sim import PtyMeter
+            sim = pty_sims[port] = PtyMeter.from_url(port)
+            sim.start()
+        import serial
+        return serial.Serial(port=sim.port, baudrate=baud, timeout=1)
+    if port.startswith("sim://"):
+        from scanner_sim import ScriptedScanner
+        return ScriptedScanner.from_url(port)
+    import serial
+    return serial.Serial(port=port, baudrate=baud, timeout=1)
+
+
+def split_cells(n, k):
+    """แบ่ง cell 0..n-1 ให้ k เครื่องเป็นช่วงต่อเนื่อง (ขนาดต่างกันไม่เกิน 1)"""
+    k = max(1, int(k))
+    base, extra = divmod(int(n), k)
+    out, start = [], 0
+    for i in range(k):
+        size = base + (1 if i < extra else 0)
+        out.append(range(start, start + size))
+        start += size
+    return out
+
+
+class MeterSlot:
+    """One meter on one port: its session, worker, slice of cells and auto-mode state"""
+
+    def __init__(self, session, worker, cells=range(0)):
+        self.port = session.port
+        self.session = session
+        self.worker = worker
+        self.cells = cells
+        self.cursor = None     # next cell to measure in auto mode (None = idle/done)
+        self.pending = None    # (gen, from_auto) of the request in flight
+        self.auto_job = None   # Tk after() id of the next auto tick
+        self.sweep_left = 0    # scanner sweep readings still to come
+        self.shown_state = None   # session.state last shown in the GUI
+
+    @property
+    def ser(self):
+        return self.session.ser
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+        self.pending = None
+        self.session.close()
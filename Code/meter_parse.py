@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Meter reply parser (one place for every read path)
+- parse_reply(): one 'R,V[,status]' reply  -> (r_ohm, v_volt, status|None)
+- parse_block(): many 'R,V,status' triples in one buffer (bulk / stream)
+  -> [(r_ohm, v_volt, status), ...]; rows must follow each other field by field
+  (only a leading echo may be skipped) and status must be an integer, so a
+  dropped field or comma is a ValueError instead of every later reading shifting
+- No per-token try/float(): clean input goes through bytes.split() + map(float)
+  in C; anything else falls back to one compiled pattern, so a bad reply costs
+  at most one caught ValueError per reply/block, not one per token
+- nan / inf (and overflow like 1e999) are not readings: ValueError, same as a
+  malformed reply
+- Units are the meter's (ohms, volts); callers convert R to mΩ for the GUI
+
+Benchmark against the old code:  python bench_parse.py
+"""
+
+import math, re
+
+_NUM = rb"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_SEP = rb"\s*[,\s]\s*"
+
+# R, V and optional integer status -- search() so echoed text in front is skipped
+# (?![\d.eE]) หลัง V: คำตอบที่ขาดกลาง exponent ('+3.1E' / '+3.1E+0' ของ '+3.1E+01') ไม่ใช่ค่า 3.1
+_REPLY  = re.compile(rb"(" + _NUM + rb")" + _SEP + rb"(" + _NUM + rb")(?![\d.eE])(?:" + _SEP + rb"([-+]?\d+)(?![\d.eE]))?")
+# ก้อนข้อมูล: match() ต่อจากแถวก่อนหน้าทีละแถว (ไม่ใช่ findall) -- ทุก field ต้องจบที่ขอบ field
+_END    = rb"(?![\d.eE])"
+_TRIPLE = re.compile(rb"(" + _NUM + rb")" + _END + _SEP + rb"(" + _NUM + rb")" + _END + _SEP
+                     + rb"([-+]?\d+)" + _END + rb"(?:" + _SEP + rb"|\s*\Z)")   # + ตัวคั่นแถว / จบก้อน
+_ECHO    = re.compile(rb"[^\d+\-.]*")   # ข้อความนำหน้าที่ไม่มีตัวเลข (echo ของคำสั่ง)
+# reading สุดท้ายที่ยังมาไม่ครบ: R หรือ R,V ที่เป็นตัวเลขสมบูรณ์
+_PARTIAL = re.compile(rb"(?:" + _NUM + _END + rb")(?:" + _SEP + _NUM + _END + rb")?\s*,?\s*")
+# pattern ข้างบนไม่จับ nan/inf -> ถ้าไม่ดักไว้ก่อน มันจะข้ามไปจับคู่ตัวเลขถัดไปผิดตำแหน่งเงียบๆ
+_NONFINITE = re.compile(rb"(?<![A-Za-z])[-+]?(?:nan|inf(?:inity)?)(?![A-Za-z])", re.I)
+
+
+# ตัวอักษรที่มีได้ในก้อนข้อมูลปกติ -- ถ้ามีแค่นี้ใช้ split() ได้เลย ไม่ต้องใช้ regex
+_NUM_CHARS = b"0123456789+-.eE, \t\r\n"
+_INT_CHARS = b"0123456789+-"
+
+
+def _check_finite(vals, raw):
+    """float() รับ 'nan' / 'inf' / '1e999' ได้ -- ไม่ใช่ค่าที่วัดจริง ให้เป็น ValueError
+    sum() ใน C ก่อน: ตรวจทีละค่าเฉพาะเมื่อผลรวมไม่ finite"""
+    if not math.isfinite(sum(vals)) and not all(map(math.isfinite, vals)):
+        raise ValueError(f"Non-finite value in reply: {raw.strip()[:60]!r}")
+
+
+def _check_no_nonfinite_text(raw):
+    """ใช้ก่อนทาง regex: token 'nan' / 'inf' ในคำตอบ = ValueError"""
+    if _NONFINITE.search(raw):
+        raise ValueError(f"Non-finite value in reply: {raw.strip()[:60]!r}")
+
+
+def parse_reply(raw):
+    """'+5.87263E-03,+3.09940E+00,+0' -> (0.00587263, 3.0994, 0); status None ถ้าไม่มี"""
+    if isinstance(raw, str):
+        raw = raw.encode("ascii", "ignore")
+    # fast path: รูปแบบมาตรฐาน 'R,V' หรือ 'R,V,status'
+    parts = raw.split(b",")
+    if 2 <= len(parts) <= 3:
+        try:
+            r, v, st = float(parts[0]), float(parts[1]), (int(parts[2]) if len(parts) == 3 else None)
+        except ValueError:
+            pass
+        else:
+            _check_finite((r, v), raw)
+            return r, v, st
+    _check_no_nonfinite_text(raw)
+    m = _REPLY.search(raw)
+    if m is None:
+        raise ValueError(f"Invalid data format: {raw.strip()!r}")
+    r, v, st = m.groups()
+    r, v = float(r), float(v)
+    _check_finite((r, v), raw)
+    return r, v, (None if st is None else int(st))
+
+
+def _flat_values(raw):
+    """ก้อนที่มีแต่ตัวเลขและตัวคั่น -> [float, ...] ; ไม่ใช่ก็คืน None (ให้ไปใช้ regex)"""
+    if raw.translate(None, _NUM_CHARS) or b",," in raw:   # ',,' = field หาย -> ให้ regex ตัดสิน
+        return None
+    toks = raw.replace(b",", b" ").split()
+    if len(toks) % 3:
+        return None
+    try:
+        vals = list(map(float, toks))
+    except ValueError:
+        return None
+    # status ต้องเป็นจำนวนเต็ม: int(float) จะปัด '+0.5' เป็น 0 เงียบๆ (และ field เลื่อนมักมาเป็นทศนิยม)
+    if b"".join(toks[2::3]).translate(None, _INT_CHARS):
+        raise ValueError(f"Status field is not an integer: {raw.strip()[:60]!r}")
+    return vals
+
+
+def _regex_rows(raw, partial):
+    """ทาง regex: [(r, v, st) bytes, ...] ต่อกันตั้งแต่ต้นจนจบ -- ข้ามได้แค่ echo นำหน้า
+    เหลือท้ายได้แค่ reading ที่ยังมาไม่ครบ (ถ้า partial) นอกนั้น ValueError"""
+    _check_no_nonfinite_text(raw)
+    rows = []
+    pos, n = _ECHO.match(raw).end(), len(raw)
+    match = _TRIPLE.match
+    while pos < n:
+        m = match(raw, pos)
+        if m is None:
+            break
+        rows.append(m.groups())
+        pos = m.end()
+    tail = raw[pos:]
+    if tail.strip() and not (partial and _PARTIAL.fullmatch(tail)):
+        what = "Incomplete reading" if _PARTIAL.fullmatch(tail) else "Misaligned data"
+        raise ValueError(f"{what} in block after {len(rows)} readings: {tail.strip()[:60]!r}")
+    return rows
+
+
+def parse_block(raw, partial=True):
+    """ก้อน 'R,V,st,R,V,st,...' (คั่นด้วย , หรือขึ้นบรรทัดใหม่) -> [(r_ohm, v_volt, status), ...]
+    partial=True: reading สุดท้ายที่ยังมาไม่ครบถูกตัดทิ้ง (ก้อนที่ยังอ่านไม่จบ); False = ValueError"""
+    if isinstance(raw, str):
+        raw = raw.encode("ascii", "ignore")
+    vals = _flat_values(raw)
+    if vals is not None:
+        _check_finite(vals, raw)
+        return list(zip(vals[0::3], vals[1::3], map(int, vals[2::3])))
+    rows = [(float(r), float(v), int(st)) for r, v, st in _regex_rows(raw, partial)]
+    _check_finite([x for row in rows for x in row[:2]], raw)
+    return rows
+
+
+def parse_block_columns(raw, r_scale=1.0, partial=True):
+    """เหมือน parse_block แต่คืนเป็นคอลัมน์ (rs, vs, statuses) -- R คูณ r_scale (1000 -> mΩ)"""
+    if isinstance(raw, str):
+        raw = raw.encode("ascii", "ignore")
+    vals = _flat_values(raw)
+    if vals is not None:
+        _check_finite(vals, raw)
+        rs = vals[0::3]
+        if r_scale != 1.0:
+            rs = [r * r_scale for r in rs]
+        return rs, vals[1::3], list(map(int, vals[2::3]))
+    triples = _regex_rows(raw, partial)
+    rs = [float(t[0]) * r_scale for t in triples]
+    vs = [float(t[1]) for t in triples]
+    sts = [int(t[2]) for t in triples]
+    _check_finite(rs + vs, raw)
+    return rs, vs, sts
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Virtual meter on a pseudo-terminal (Linux/macOS) for load testing the real serial stack
+- Opens a pty pair; the slave path (e.g. /dev/pts/5) is a real serial device that
+  pyserial / the app can open, so framing, timeouts and parsing are exercised
+- Answers FETC? / READ? / *IDN? / :ROUT:CLOS / :ROUT:SCAN / :TRIG:COUN / :INIT / :MEM:* like
+  scanner_sim.ScriptedScanner, but every reading is freshly generated
+- Configurable reply latency + jitter, baud-rate limit (10 bits per character),
+  dropped bytes, dropped replies and out-of-spec rate
+- In the app, port 'sim://pty?latency=0.02&jitter=0.005&drop=0.001&oos=0.1' starts one
+
+Usage:  python meter_sim.py [--latency S] [--jitter S] [--baud N] [--drop P] [--noreply P] [--oos P]
+"""
+
+import argparse, os, random, select, threading, time
+from collections import deque
+
+from scanner_sim import ScriptedScanner
+
+
+class VirtualMeter(ScriptedScanner):
+    """Command model: ScriptedScanner's SCPI handling with a new random reading every time"""
+
+    def __init__(self, oos_rate=0.1, seed=None, r_set=10.0, r_tol=0.5, v_set=5.0, v_tol=0.1):
+        super().__init__(script={}, seed=0)
+        self.rnd = random.Random(seed)
+        self.oos_rate = oos_rate
+        self.r_set, self.r_tol, self.v_set, self.v_tol = r_set, r_tol, v_set, v_tol
+
+    def _handle(self, cmd):
+        if cmd.upper() == b"*IDN?":
+            self.commands.append(cmd)
+            self._out += b"MEASURE_RV,VIRTUAL-METER,0,1.0\r\n"
+            return
+        super()._handle(cmd)
+
+    def _reading(self, ch):
+        k = self.rnd.uniform(1.1, 1.6) * self.rnd.choice((-1, 1)) if self.rnd.random() < self.oos_rate \
+            else self.rnd.uniform(-0.6, 0.6)
+        r = (self.r_set + k * self.r_tol) / 1000.0   # meter replies in ohms
+        v = self.v_set + self.rnd.uniform(-0.6, 0.6) * self.v_tol
+        return f"{r:+.5E},{v:+.5E},+0".encode("ascii")
+
+
+class PtyMeter:
+    """
+    Serves a VirtualMeter on a pty from a background thread.
+    Replies are delayed by command receive time + latency + jitter, then sent
+    at the simulated baud rate; bytes/replies can be dropped at random.
+    """
+
+    def __init__(self, latency=0.02, jitter=0.005, baudrate=9600, drop_rate=0.0,
+                 noreply_rate=0.0, oos_rate=0.1, seed=None):
+        try:
+            import tty
+        except ImportError:
+            raise RuntimeError("The pty meter simulator needs Linux or macOS.")
+        self.latency = latency
+        self.jitter = jitter
+        self.baudrate = baudrate
+        self.char_s = 10.0 / baudrate
+        self.drop_rate = drop_rate
+        self.noreply_rate = noreply_rate
+        self.meter = VirtualMeter(oos_rate=oos_rate, seed=seed)
+        self.rnd = random.Random(seed)
+
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)          # no echo / line editing on the "wire"
+        self.port = os.ttyname(self._slave)
+
+        self.n_replies = 0
+        self.n_noreply = 0
+        self.n_dropped_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="PtyMeter", daemon=True)
+
+    @classmethod
+    def from_url(cls, url):
+        """'sim://pty?latency=0.02&jitter=0.005&baud=9600&drop=0&noreply=0&oos=0.1&seed=1'"""
+        opts = dict(p.split("=", 1) for p in url.partition("?")[2].split("&") if "=" in p)
+        kw = {}
+        for key, name, conv in (("latency", "latency", float), ("jitter", "jitter", float),
+                                ("baud", "baudrate", int), ("drop", "drop_rate", float),
+                                ("noreply", "noreply_rate", float), ("oos", "oos_rate", float),
+                                ("seed", "seed", int)):
+            if key in opts:
+                kw[name] = conv(opts[key])
+        return cls(**kw)
+
+    def start(self):
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(2.0)
+        for fd in (self.master, self._slave):
+            try: os.close(fd)
+            except OSError: pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- wire ----
+    def _serve(self):
+        outq = deque()    # (due_time, reply bytes) in send order
+        last_due = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            wait = min(0.05, max(0.0, outq[0][0] - now)) if outq else 0.05
+            try:
+                readable, _, _ = select.select([self.master], [], [], wait)
+            except (OSError, ValueError):
+                return
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    data = b""
+                if data:
+                    # เวลารับคำสั่งที่ baud นี้ + เวลาวัด
+                    t_rx = time.monotonic() + len(data) * self.char_s
+                    self.meter.write(data)
+                    out = bytes(self.meter._out); self.meter._out.clear()
+                    for line in out.splitlines(keepends=True):
+                        due = max(last_due, t_rx + self.latency + self.rnd.uniform(0, self.jitter))
+                        last_due = due
+                        outq.append((due, line))
+
+            while outq and outq[0][0] <= time.monotonic():
+                _due, line = outq.popleft()
+                self._send(line)
+
+    def _send(self, line):
+        if self.noreply_rate and self.rnd.random() < self.noreply_rate:
+            self.n_noreply += 1
+            return
+        if self.drop_rate:
+            kept = bytes(b for b in line if self.rnd.random() >= self.drop_rate)
+            self.n_dropped_bytes += len(line) - len(kept)
+            line = kept
+        try:
+            os.write(self.master, line)
+        except OSError:
+            return
+        self.n_replies += 1
+        time.sleep(len(line) * self.char_s)   # สายส่งได้แค่ baud นี้
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Virtual meter on a pty")
+    ap.add_argument("--latency", type=float, default=0.02, help="reply latency, s")
+    ap.add_argument("--jitter", type=float, default=0.005, help="extra random latency 0..J, s")
+    ap.add_argument("--baud", type=int, default=9600)
+    ap.add_argument("--drop", type=float, default=0.0, help="probability of dropping each reply byte")
+    ap.add_argument("--noreply", type=float, default=0.0, help="probability of not answering a query")
+    ap.add_argument("--oos", type=float, default=0.1, help="out-of-spec reading rate")
+    ap.add_argument("--seed", type=int, default=None)
+    a = ap.parse_args()
+
+    sim = PtyMeter(latency=a.latency, jitter=a.jitter, baudrate=a.baud, drop_rate=a.drop,
+                   noreply_rate=a.noreply, oos_rate=a.oos, seed=a.seed)
+    print(f"Virtual meter on {sim.start()}  (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(5)
+            print(f"replies {sim.n_replies} · no-reply {sim.n_noreply} · dropped bytes {sim.n_dropped_bytes}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
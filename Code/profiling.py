@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Run profiler: cProfile + tracemalloc around one auto run
+- Turned on from the Setting tab, or with MEASURE_RV_PROFILE=1 in the environment
+  (for the windowed PyInstaller build, where there is no console to attach to)
+- On finish writes next to the exports:
+    <model>_<ts>_profile.prof   cProfile stats (snakeviz / pstats)
+    <model>_<ts>_profile.txt    top functions by cumulative time + tracemalloc
+                                top-N allocation sites, current/peak traced memory
+- cProfile sees the GUI thread only; serial time is in the Stage Timings window
+- cProfile / pstats / tracemalloc are imported on first use, not at app startup
+"""
+
+import os, time
+
+ENV_VAR = "MEASURE_RV_PROFILE"
+TOP_N = 25
+
+
+def env_enabled():
+    return os.environ.get(ENV_VAR, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+class RunProfiler:
+    def __init__(self, folder, name="model", top_n=TOP_N):
+        self.folder = folder
+        self.name = name
+        self.top_n = top_n
+        import cProfile
+        self._prof = cProfile.Profile()
+        self._own_tracemalloc = False
+        self._t0 = 0.0
+
+    def start(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        self._t0 = time.perf_counter()
+        self._prof.enable()
+        return self
+
+    def stop(self):
+        """หยุดและเขียนไฟล์; คืน path ของรายงาน .txt"""
+        import io, pstats, tracemalloc
+        self._prof.disable()
+        wall = time.perf_counter() - self._t0
+        snap = tracemalloc.take_snapshot()
+        cur, peak = tracemalloc.get_traced_memory()
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.folder, exist_ok=True)
+        base = os.path.join(self.folder, f"{self.name}_{time.strftime('%Y%m%d_%H%M%S')}_profile")
+        self._prof.dump_stats(base + ".prof")
+
+        out = io.StringIO()
+        out.write(f"Run wall time {wall:.3f} s · traced memory current {cur/1024:.0f} KiB · peak {peak/1024:.0f} KiB\n\n")
+        out.write(f"== cProfile: top {self.top_n} by cumulative time (GUI thread) ==\n")
+        pstats.Stats(self._prof, stream=out).sort_stats("cumulative").print_stats(self.top_n)
+        out.write(f"\n== tracemalloc: top {self.top_n} allocation sites (live at end of run) ==\n")
+        for st in snap.statistics("lineno")[:self.top_n]:
+            out.write(f"{st.size/1024:10.1f} KiB {st.count:8d} blocks  {st.traceback}\n")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        return base + ".txt"
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Frame-coalesced redraw scheduler for the Tk windows
+- request(name, fn[, items]): mark a redraw as dirty; nothing is drawn yet
+- Everything dirty is drawn together at most once per frame (FRAME_MS), from
+  after() / after_idle(), in the order it was first requested, so ten readings
+  inside one frame cost one redraw instead of ten
+- items (e.g. cell indices) are collected per name and fn gets them sorted;
+  a request without items means "redraw everything" for that name
+- flush(): draw now, for code that reads what is on screen right after
+- timer(name, seconds) is called per redraw (stage_timer.STAGES.add fits)
+"""
+
+import time
+
+FRAME_MS = 16
+
+
+class RenderScheduler:
+    def __init__(self, widget, frame_ms=FRAME_MS, timer=None):
+        self.widget = widget
+        self.frame_s = frame_ms / 1000.0
+        self.timer = timer
+        self._pending = {}    # name -> [fn, items, whole]   (dict คงลำดับที่ขอครั้งแรก)
+        self._job = None
+        self._last = 0.0
+
+    def request(self, name, fn, items=None):
+        ent = self._pending.get(name)
+        if ent is None:
+            ent = self._pending[name] = [fn, set(), items is None]
+        elif items is None:
+            ent[2] = True
+        if items is not None and not ent[2]:
+            ent[1].update(items)
+        if self._job is None:
+            wait = self._last + self.frame_s - time.perf_counter()
+            if wait <= 0:
+                self._job = self.widget.after_idle(self._run)
+            else:
+                self._job = self.widget.after(max(1, int(wait * 1000)), self._run)
+
+    def _run(self):
+        self._job = None
+        self.flush()
+
+    def flush(self):
+        self.cancel()
+        pending, self._pending = self._pending, {}
+        clock = time.perf_counter
+        self._last = clock()
+        for name, (fn, items, whole) in pending.items():
+            t0 = clock()
+            if whole:
+                fn()
+            else:
+                fn(sorted(items))
+            if self.timer is not None:
+                self.timer(name, clock() - t0)
+
+    def cancel(self):
+        if self._job is not None:
+            try:
+                self.widget.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Limit evaluation and result export (no Tk in here)
+- Shared by the Tk App (UI.py) and the headless runner (measure_rv.py), so a
+  reading is judged and written out the same way whichever one took it
+- limits(): Min/Max from Set ± Tol (PASS bits themselves: CellStore.evaluate)
+- result_lines(): the snapshot .txt layout (auto export / Export button) from a
+  cell_store.CellStore
+- snapshot_path(): <folder>/<model>_<ts><suffix>.txt (folder created if missing)
+"""
+
+import os, time
+
+LABEL_OK = "PASS"
+LABEL_NG = "NOT PASS"
+
+
+def limits(set_value, tol):
+    set_value, tol = float(set_value), float(tol)
+    return set_value - tol, set_value + tol
+
+
+def result_lines(model, r_set, r_tol, v_set, v_tol, cells, count=None):
+    """cells = cell_store.CellStore (PASS bits ต้อง evaluate ไว้แล้ว)"""
+    rmin, rmax = limits(r_set, r_tol)
+    vmin, vmax = limits(v_set, v_tol)
+    lines = []
+    lines.append(f"Model\t{model.strip() or '-'}")
+    lines.append(f"Time\t{time.strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.append("")
+    lines.append(f"R Set\t{r_set} mΩ\tTol ±{r_tol} mΩ\t(min={rmin}, max={rmax})")
+    lines.append(f"V Set\t{v_set} V\tTol ±{v_tol} V\t(min={vmin}, max={vmax})")
+    lines.append("")
+    lines.append("Cell\tR(mΩ)\tV(V)\tResult")
+    for i in range(len(cells) if count is None else count):
+        r, v = cells.get(i)
+        if r is None or v is None:
+            lines.append(f"{i+1}\t\t\tN/A")
+        else:
+            res = LABEL_OK if cells.passed(i) else LABEL_NG
+            lines.append(f"{i+1}\t{r:.6f}\t{v:.6f}\t{res}")
+    return lines
+
+
+def snapshot_path(folder, model, suffix=""):
+    folder = folder.strip() or os.getcwd()
+    os.makedirs(folder, exist_ok=True)
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(folder, f"{model.strip() or 'model'}_{ts}{suffix}.txt")
+
+
+def write_lines(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Scripted stand-in for a meter with a relay/multiplexer scanner in front of it
+- Behaves like a pyserial port (write/readline/flush/reset_*_buffer/close)
+- Understands ':ROUT:CLOS (@n)', ':READ?' and 'FETC?' (';'-separated commands ok)
+- Buffered run: ':ROUT:SCAN (@a:b)' + ':TRIG:COUN n' + ':INIT' stores n readings
+  stepping through channels a..b (no scan list: n readings of the closed channel,
+  like the real meter), ':MEM:COUN?' / ':MEM:DATA?' read it back (one long line),
+  ':MEM:CLE' clears
+- Values per channel come from a script dict {channel: (r_ohm, v_volt)} or a
+  seeded generator around the app defaults (10 mΩ / 5.0 V, some out of spec)
+- In the app, a COM Port / Extra Port of 'sim://scanner' opens one of these
+
+Self-check:  python scanner_sim.py [cells]
+"""
+
+import random, re, sys, time
+
+_CLOSE_RE = re.compile(rb":?ROUT(?:E)?:CLOS(?:E)?\s*\(@(\d+)\)", re.I)
+_SCAN_RE  = re.compile(rb":?ROUT(?:E)?:SCAN\s*\(@(\d+)(?::(\d+))?\)", re.I)
+
+
+class ScriptedScanner:
+    def __init__(self, script=None, channels=999, seed=1, read_delay=0.0,
+                 r_set=10.0, r_tol=0.5, v_set=5.0, v_tol=0.1, fail_every=7):
+        self.port = "sim://scanner"
+        self.is_open = True
+        self.timeout = 1
+        self.baudrate = 9600
+        self.read_delay = read_delay   # s per READ? (simulated integration time)
+        self.channel = 1
+        self.trig_count = 1
+        self.scan = None               # [channel, ...] จาก :ROUT:SCAN
+        self.memory = []
+        self.commands = []             # every command received, for inspection
+        self._in = b""
+        self._out = bytearray()
+
+        if script is None:
+            rnd = random.Random(seed)
+            script = {}
+            for ch in range(1, channels + 1):
+                bad = fail_every and ch % fail_every == 0
+                k = 1.6 if bad else 0.6
+                r = r_set + rnd.uniform(-k, k) * r_tol
+                v = v_set + rnd.uniform(-k, k) * v_tol
+                script[ch] = (r / 1000.0, v)   # meter replies in ohms
+        self.script = script
+
+    @classmethod
+    def from_url(cls, url, **kw):
+        """'sim://scanner?seed=3&delay=0.01' -> ScriptedScanner"""
+        opts = dict(p.split("=", 1) for p in url.partition("?")[2].split("&") if "=" in p)
+        if "seed" in opts:  kw.setdefault("seed", int(opts["seed"]))
+        if "delay" in opts: kw.setdefault("read_delay", float(opts["delay"]))
+        return cls(**kw)
+
+    # ---- pyserial-like API ----
+    def write(self, data):
+        self._in += bytes(data)
+        while b"\n" in self._in:
+            line, self._in = self._in.split(b"\n", 1)
+            for cmd in line.strip().split(b";"):
+                self._handle(cmd.strip())
+        return len(data)
+
+    def readline(self):
+        i = self._out.find(b"\n")
+        if i < 0:
+            return b""
+        line = bytes(self._out[:i+1]); del self._out[:i+1]
+        return line
+
+    def read_until(self, expected=b"\n", size=None):
+        return self.readline()
+
+    def flush(self): pass
+    def reset_input_buffer(self): self._out.clear()
+    def reset_output_buffer(self): pass
+    def close(self): self.is_open = False
+
+    # ---- command handling ----
+    def _handle(self, cmd):
+        if not cmd:
+            return
+        self.commands.append(cmd)
+        m = _CLOSE_RE.match(cmd)
+        if m:
+            self.channel = int(m.group(1))
+            return
+        m = _SCAN_RE.match(cmd)
+        if m:
+            a = int(m.group(1))
+            self.scan = list(range(a, int(m.group(2) or a) + 1))
+            return
+        u = cmd.upper().lstrip(b":")
+        if u in (b"READ?", b"FETC?", b"FETCH?"):
+            if self.read_delay:
+                time.sleep(self.read_delay)
+            self._out += self._reading(self.channel) + b"\r\n"
+        elif u.startswith(b"TRIG:COUN "):
+            self.trig_count = int(u.split()[1])
+        elif u == b"INIT":
+            chans = self.scan or [self.channel]
+            self.memory = [self._reading(chans[k % len(chans)]) for k in range(self.trig_count)]
+        elif u == b"MEM:CLE":
+            self.memory = []
+        elif u == b"MEM:COUN?":
+            self._out += b"%d\r\n" % len(self.memory)
+        elif u == b"MEM:DATA?":
+            self._out += b",".join(self.memory) + b"\r\n"
+
+    def _reading(self, ch):
+        r, v = self.script.get(ch, (float("nan"), float("nan")))
+        return f"{r:+.5E},{v:+.5E},+0".encode("ascii")
+
+
+if __name__ == "__main__":
+    from meter_io import sweep_readings
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    sim = ScriptedScanner(read_delay=0.0)
+    t0 = time.perf_counter()
+    rows = list(sweep_readings(sim, range(1, n + 1)))
+    dt = time.perf_counter() - t0
+    for ch, r, v in rows:
+        print(f"ch{ch:>3}  R={r:8.3f} mΩ  V={v:.4f} V")
+    print(f"{n} channels in {dt*1000:.1f} ms, {len(sim.commands)} commands")
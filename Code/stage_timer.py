@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Per-stage latency histograms for the measure hot path
+- Fixed log-spaced buckets (1 µs .. 100 s, 10 per decade): add() is one bisect
+  + a few integer adds under a lock, no per-sample allocation, memory is constant
+- Stages are created on first use; serial stages are filled from the worker
+  thread (meter_io), Tk stages from the GUI thread (UI)
+- summary(): count / mean / p50 / p90 / p99 / max per stage (percentiles are
+  bucket upper edges, i.e. within ~26 %)
+- dump(path): summary table + the non-empty buckets of every stage
+"""
+
+import bisect, threading, time
+
+_PER_DECADE = 10
+EDGES = [10 ** (e / _PER_DECADE) * 1e-6 for e in range(0, 8 * _PER_DECADE + 1)]   # 1 µs .. 100 s
+
+
+class _Hist:
+    __slots__ = ("counts", "n", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(EDGES) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def percentile(self, q):
+        if not self.n:
+            return 0.0
+        want = q * self.n
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= want:
+                return min(EDGES[i] if i < len(EDGES) else self.max, self.max)
+        return self.max
+
+
+class StageHistograms:
+    def __init__(self):
+        self._h = {}
+        self._order = []
+        self._lock = threading.Lock()
+        self.enabled = True
+
+    def add(self, stage, dt):
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._h.get(stage)
+            if h is None:
+                h = self._h[stage] = _Hist()
+                self._order.append(stage)
+            h.counts[bisect.bisect_left(EDGES, dt)] += 1
+            h.n += 1
+            h.total += dt
+            if dt > h.max:
+                h.max = dt
+
+    def reset(self):
+        with self._lock:
+            self._h.clear()
+            self._order.clear()
+
+    def summary(self):
+        """[(stage, n, mean_s, p50_s, p90_s, p99_s, max_s), ...] ตามลำดับที่เจอครั้งแรก"""
+        with self._lock:
+            return [(s, h.n, h.total / h.n, h.percentile(0.5), h.percentile(0.9), h.percentile(0.99), h.max)
+                    for s in self._order for h in (self._h[s],)]
+
+    def dump(self, path):
+        rows = self.summary()
+        lines = [f"Stage timings  {time.strftime('%Y-%m-%d %H:%M:%S')}", "",
+                 f"{'Stage':<14}{'Count':>9}{'Mean ms':>11}{'p50 ms':>11}{'p90 ms':>11}{'p99 ms':>11}{'Max ms':>11}"]
+        for s, n, mean, p50, p90, p99, mx in rows:
+            lines.append(f"{s:<14}{n:>9}{mean*1e3:>11.4f}{p50*1e3:>11.4f}{p90*1e3:>11.4f}{p99*1e3:>11.4f}{mx*1e3:>11.4f}")
+        lines.append("")
+        lines.append("Buckets (upper edge ms: count)")
+        with self._lock:
+            for s in self._order:
+                h = self._h[s]
+                cells = [f"{(EDGES[i] if i < len(EDGES) else float('inf'))*1e3:.3g}:{c}"
+                         for i, c in enumerate(h.counts) if c]
+                lines.append(f"{s:<14}" + "  ".join(cells))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+# ตัวเดียวทั้งโปรแกรม (worker threads + GUI)
+STAGES = StageHistograms()
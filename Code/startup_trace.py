@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Startup trace: wall time per launch phase
+- mark(phase): time since the previous mark (the first one counts from T0,
+  taken when UI.py starts importing); add(phase, dt) for work timed on its own
+  later (e.g. the Setting tab, built on first selection)
+- Frozen onefile build: "unpack" = from the creation of the _MEIPASS folder
+  (bootloader starts extracting) to T0
+- Every phase also goes into stage_timer.STAGES as "start:<phase>"
+- MEASURE_RV_STARTUP_TRACE=1 writes startup_trace.txt to the current folder,
+  any other non-empty value is taken as the file path
+"""
+
+import os, sys, time
+
+from stage_timer import STAGES
+
+ENV_VAR = "MEASURE_RV_STARTUP_TRACE"
+
+
+class StartupTrace:
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self._last = self.t0
+        self.phases = []    # [(phase, seconds), ...]
+        if getattr(sys, "frozen", False):
+            try:
+                # ctime ของโฟลเดอร์ที่ bootloader แตกไฟล์ลงไป ≈ เวลาเริ่ม unpack
+                unpack = time.time() - (time.perf_counter() - self.t0) - os.stat(sys._MEIPASS).st_ctime
+                if unpack > 0:
+                    self.add("unpack", unpack)
+            except Exception:
+                pass
+
+    def add(self, phase, dt):
+        self.phases.append((phase, dt))
+        STAGES.add("start:" + phase, dt)
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.add(phase, now - self._last)
+        self._last = now
+
+    def lines(self):
+        out = [f"{p:<14}{dt*1e3:>10.1f} ms" for p, dt in self.phases]
+        out.append(f"{'total':<14}{sum(dt for _, dt in self.phases)*1e3:>10.1f} ms")
+        return out
+
+    def dump_if_enabled(self):
+        """เขียนไฟล์ถ้าตั้ง MEASURE_RV_STARTUP_TRACE; คืน path หรือ None"""
+        val = os.environ.get(ENV_VAR, "").strip()
+        if val.lower() in ("", "0", "false", "no", "off"):
+            return None
+        path = "startup_trace.txt" if val.lower() in ("1", "true", "yes", "on") else val
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"Startup  {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n" + "\n".join(self.lines()) + "\n")
+        except OSError:
+            return None
+        return path
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for cell_store.CellStore: NaN = not measured, PASS bits around byte boundaries
+
+Run from the Code folder:  python -m pytest -q
+"""
+
+from cell_store import CellStore
+
+
+R_LIM, V_LIM = (9.5, 10.5), (4.9, 5.1)
+
+
+def test_cells_start_unmeasured():
+    cells = CellStore(17)
+    cells.evaluate(R_LIM, V_LIM)
+    assert len(cells) == 17 and len(cells.bits) == 3
+    assert cells.get(0) == (None, None) and not cells.measured(0) and not cells.passed(0)
+    assert cells.counts() == (0, 0)
+
+
+def test_pass_bits_across_byte_boundaries():
+    cells = CellStore(17)
+    for i in (0, 7, 8, 9, 15, 16):
+        cells.set(i, 10.0, 5.0)
+    cells.evaluate(R_LIM, V_LIM)
+    assert [i for i in range(17) if cells.passed(i)] == [0, 7, 8, 9, 15, 16]
+    assert bytes(cells.bits) == bytes([0b10000001, 0b10000011, 0b00000001])
+
+    # ล้าง bit เดียวทีละ cell: bit ข้างๆ (และ byte ข้างๆ) ต้องไม่เปลี่ยน
+    cells.set(8, 11.0, 5.0)
+    cells.evaluate(R_LIM, V_LIM, (8,))
+    assert bytes(cells.bits) == bytes([0b10000001, 0b10000010, 0b00000001])
+    cells.set(7, 10.0, 5.5)
+    cells.evaluate(R_LIM, V_LIM, (7,))
+    assert bytes(cells.bits) == bytes([0b00000001, 0b10000010, 0b00000001])
+    cells.set(8, 10.0, 5.0)
+    cells.evaluate(R_LIM, V_LIM, (8,))
+    assert [i for i in range(17) if cells.passed(i)] == [0, 8, 9, 15, 16]
+    assert cells.counts() == (6, 5)
+
+
+def test_full_evaluate_drops_stale_bits():
+    cells = CellStore(9)
+    for i in range(9):
+        cells.set(i, 10.0, 5.0)
+    cells.evaluate(R_LIM, V_LIM)
+    assert cells.counts() == (9, 9)
+    cells.evaluate((10.2, 10.5), V_LIM)        # แก้ limit -> ตัดสินใหม่ทั้งก้อน
+    assert cells.counts() == (9, 0) and bytes(cells.bits) == b"\0\0"
+    cells.set(4, None, None)
+    assert cells.get(4) == (None, None) and cells.counts()[0] == 8
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for meter_io.LatencyTracker: read deadline from measured reply latency
+
+Run from the Code folder:  python -m pytest -q
+"""
+
+import pytest
+
+from meter_io import (LatencyTracker, READ_TIMEOUT_DEFAULT, READ_TIMEOUT_MIN, READ_TIMEOUT_MAX,
+                      LAT_MIN_SAMPLES, LAT_P99_FACTOR, LAT_MARGIN_CHARS, LAT_MARGIN_S, SILENT_AFTER)
+
+
+def test_deadline_default_until_enough_samples():
+    t = LatencyTracker(9600)
+    assert t.deadline() == READ_TIMEOUT_DEFAULT
+    for _ in range(LAT_MIN_SAMPLES - 1):
+        t.add(0.1)
+    assert t.deadline() == READ_TIMEOUT_DEFAULT
+    t.add(0.1)
+    margin = LAT_MARGIN_CHARS * 10.0 / 9600 + LAT_MARGIN_S
+    assert t.deadline() == pytest.approx(0.1 * LAT_P99_FACTOR + margin)
+
+
+def test_deadline_clamped():
+    fast, slow = LatencyTracker(115200), LatencyTracker(9600)
+    for _ in range(LAT_MIN_SAMPLES):
+        fast.add(0.001)
+        slow.add(5.0)
+    assert fast.deadline() == READ_TIMEOUT_MIN
+    assert slow.deadline() == READ_TIMEOUT_MAX
+
+
+def test_deadline_silent_meter_fails_fast():
+    t = LatencyTracker(9600)
+    for k in range(100):
+        t.add(1.0 if k % 10 == 0 else 0.05)     # p50 = 0.05, p99 = 1.0
+    normal = t.deadline()
+    for _ in range(SILENT_AFTER):
+        t.timed_out()
+    assert t.silent
+    margin = LAT_MARGIN_CHARS * 10.0 / 9600 + LAT_MARGIN_S
+    assert t.deadline() == pytest.approx(2 * 0.05 + margin)
+    assert t.deadline() < normal
+    t.add(0.05)                                  # ตอบกลับมาแล้ว -> เลิกนับว่าเงียบ
+    assert not t.silent and t.deadline() == normal
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for meter_io.read_memory_block (buffered run) against the scripted scanner
+
+Run from the Code folder:  python -m pytest -q
+"""
+
+import pytest
+
+from meter_io import read_memory_block, sweep_readings
+from scanner_sim import ScriptedScanner
+
+
+def test_memory_block_scans_channels_in_order():
+    sim = ScriptedScanner(seed=3)
+    rs, vs = read_memory_block(sim, 40, poll_s=0)
+    ref = list(sweep_readings(ScriptedScanner(seed=3), range(1, 41)))
+    assert rs == pytest.approx([r for _ch, r, _v in ref])
+    assert vs == pytest.approx([v for _ch, _r, v in ref])
+    assert b":ROUT:SCAN (@1:40)" in sim.commands
+
+
+def test_memory_block_multi_line_download():
+    class OnePerLine(ScriptedScanner):
+        def _handle(self, cmd):
+            if cmd.upper().lstrip(b":") == b"MEM:DATA?":
+                self._out += b"\r\n".join(self.memory) + b"\r\n"
+            else:
+                super()._handle(cmd)
+    rs, _vs = read_memory_block(OnePerLine(seed=3), 25, poll_s=0)
+    assert rs == read_memory_block(ScriptedScanner(seed=3), 25, poll_s=0)[0]
+
+
+class _Garbled(ScriptedScanner):
+    """:MEM:DATA? ตอบตาม self.data (ก้อนที่เพี้ยน) แทนหน่วยความจำจริง"""
+    data = b""
+
+    def _handle(self, cmd):
+        if cmd.upper().lstrip(b":") == b"MEM:DATA?":
+            self._out += self.data + b"\r\n"
+        else:
+            super()._handle(cmd)
+
+
+@pytest.mark.parametrize("data", [
+    b"+5.1E-03,+5.0E+00,+0,+5.2E-03,+5.0E+00+0,+5.3E-03,+5.0E+00,+0,+5.4E-03,+5.0E+00,+0",  # comma หาย
+    b"+5.1E-03,+5.0E+00,+0,+5.2E-03,+0,+5.3E-03,+5.0E+00,+0,+5.4E-03,+5.0E+00,+0",          # field หาย
+    b"+5.1E-03,+5.0E+00,+0,+5.2E-03,+5.0E+00,+0,+5.3E-03,+5.0E+00,+0,+5.4E-03,+5.0E+00,+0.5",
+    b"+5.1E-03,+5.0E+00,+0,+5.2E-03,+5.0E+00,+0,+5.3E-03,+5.0E+00,+0,+5.4E-03,+5.0E+00,+0,+5.5E-03",
+    b"+5.1E-03,+5.0E+00,+0,+5.2E-03,+5.0E+00,+0,+5.3E-03,+5.0E+00,+0,+5.4E-03,+5.0E+00,+0,"
+    b"+5.5E-03,+5.0E+00,+0",                                                                # เกินมา 1 แถว
+])
+def test_memory_block_garbled_download_fails(data):
+    sim = _Garbled(seed=3)
+    sim.data = data
+    with pytest.raises(ValueError):
+        read_memory_block(sim, 4, poll_s=0)
+
+
+def test_memory_block_short_download_times_out():
+    sim = _Garbled(seed=3)
+    sim.data = b"+5.1E-03,+5.0E+00,+0,+5.2E-03,+5.0E+00,+0"
+    with pytest.raises(TimeoutError):
+        read_memory_block(sim, 4, poll_s=0)
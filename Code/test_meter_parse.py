@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for meter_parse: well-formed, malformed, partial and nan/inf replies and blocks
+
+Run from the Code folder:  python -m pytest -q
+"""
+
+import pytest
+
+from meter_parse import parse_reply, parse_block, parse_block_columns
+
+
+def test_parse_reply_formats():
+    assert parse_reply(b"+5.87263E-03,+3.09940E+00,+0\r\n") == (0.00587263, 3.0994, 0)
+    assert parse_reply("+5.0E-03,+3.1E+00") == (0.005, 3.1, None)
+    # echo ข้างหน้า / ตัวคั่นเป็นช่องว่าง -> ทาง regex
+    assert parse_reply(b"FETC? +5.0E-03 +3.1E+00 +1") == (0.005, 3.1, 1)
+
+
+@pytest.mark.parametrize("raw", [b"", b"\r\n", b"ERR", b"-113,\"Undefined header\"", b"+5.0E-03",
+                                 b"+5.0E-03,", b"+5.0E-03,+3.1E", b"+5.0E-03,+3.1E+", b",,"])
+def test_parse_reply_malformed_or_partial(raw):
+    with pytest.raises(ValueError):
+        parse_reply(raw)
+
+
+@pytest.mark.parametrize("raw", [b"nan,5.0,+0", b"+5.0E-03,inf", b"+NAN,+3.1E+00,+0",
+                                 b"-Infinity,3.1", b"1e999,3.1,+0", b"FETC? +5.0E-03,NaN,+0"])
+def test_parse_reply_rejects_non_finite(raw):
+    with pytest.raises(ValueError):
+        parse_reply(raw)
+
+
+def test_parse_block_partial_tail_dropped():
+    raw = b"1.0,2.0,+0,3.0,4.0,+1,5.0,6.0"      # ค่าสุดท้ายยังมาไม่ครบ triple
+    assert parse_block(raw) == [(1.0, 2.0, 0), (3.0, 4.0, 1)]
+    assert parse_block_columns(raw, 1000.0) == ([1000.0, 3000.0], [2.0, 4.0], [0, 1])
+    assert parse_block(b"") == [] and parse_block_columns(b"") == ([], [], [])
+    with pytest.raises(ValueError):
+        parse_block(raw, partial=False)
+    with pytest.raises(ValueError):
+        parse_block_columns(raw, partial=False)
+
+
+def test_parse_block_layouts():
+    rows = [(1.0, 2.0, 0), (3.0, 4.0, 1)]
+    assert parse_block(b"1.0,2.0,+0,3.0,4.0,+1") == rows
+    assert parse_block(b"1.0 2.0 +0\r\n3.0 4.0 +1\r\n", partial=False) == rows
+    assert parse_block(b":MEM:DATA? 1.0,2.0,+0,3.0,4.0,+1", partial=False) == rows   # echo นำหน้า
+
+
+@pytest.mark.parametrize("raw", [
+    b"1.0,2.0,+0,3.0,+0,5.0,6.0,+0",                                       # V หาย 1 field
+    b"+5.1E-03,+5.0E+00,+0,+5.2E-03,+5.0E+00+0,+5.3E-03,+5.0E+00,+0",     # comma หาย
+    b"1.0,2.0,+0,,4.0,+0",                                                 # field ว่าง
+    b"1.0,2.0,+0,,3.0,4.0,+0",
+    b"1.0,2.0,+0.5",                                                       # status ไม่ใช่จำนวนเต็ม
+    b"1.0,2.0,+0.5,3.0,4.0,+0\r\nEND",
+    b"1.0,2.0,+0,3.0,4.0,+1E0",
+    b"1.0,2.0,+0,garbage,3.0,4.0,+0",
+    b"1.0,2.0,+0,3.0,4.0,+0 trailing",
+])
+def test_parse_block_rejects_misaligned(raw):
+    with pytest.raises(ValueError):
+        parse_block(raw)
+    with pytest.raises(ValueError):
+        parse_block_columns(raw, 1000.0)
+
+
+@pytest.mark.parametrize("raw", [b"1.0,2.0,+0,nan,4.0,+0", b"1.0,2.0,+0\r\n+INF,4.0,+0",
+                                 b"1.0,2.0,+0,1e999,4.0,+0", b"1.0,-inf,+0"])
+def test_parse_block_rejects_non_finite(raw):
+    with pytest.raises(ValueError):
+        parse_block(raw)
+    with pytest.raises(ValueError):
+        parse_block_columns(raw)
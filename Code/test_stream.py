@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for MeterWorker stream mode against the scripted scanner: one FETC? per
+request, replies matched to the right cell, no serial traffic while idle
+
+Run from the Code folder:  python -m pytest -q
+"""
+
+import time
+
+import pytest
+
+from meter_io import SerialSession, MeterWorker, STREAM_SETUP_CMDS, STREAM_READ_TIMEOUT
+from scanner_sim import ScriptedScanner
+
+
+@pytest.fixture
+def stream():
+    sim = ScriptedScanner(seed=2)
+    session = SerialSession("sim://scanner", 9600, lambda p, b: sim)
+    session.open()
+    worker = MeterWorker(session, stream=True)
+    worker.start()
+    yield sim, worker
+    worker.stop()
+
+
+def _fetches(sim):
+    return sum(1 for c in sim.commands if c.upper().lstrip(b":").startswith(b"FETC"))
+
+
+def test_one_query_per_request_and_idle_is_silent(stream):
+    sim, worker = stream
+    for idx in range(5):
+        worker.request(idx)
+        got_idx, r, v, _ts, err = worker.results.get(timeout=2)
+        assert (got_idx, err) == (idx, None) and r > 0 and v > 0
+    assert _fetches(sim) == 5
+    assert sim.commands[:len(STREAM_SETUP_CMDS)] == list(STREAM_SETUP_CMDS)
+
+    time.sleep(3 * STREAM_READ_TIMEOUT)      # ว่าง: ไม่มีคำขอ -> ไม่ส่ง FETC? เพิ่ม
+    assert _fetches(sim) == 5
+
+
+def test_burst_is_answered_in_order(stream):
+    sim, worker = stream
+    for idx in range(10, 18):
+        worker.request(idx)
+    got = [worker.results.get(timeout=2) for _ in range(8)]
+    assert [g[0] for g in got] == list(range(10, 18))
+    assert all(g[4] is None for g in got)
+    assert _fetches(sim) == 8
+
+
+def test_sweep_rejected_in_stream_mode(stream):
+    _sim, worker = stream
+    worker.request_sweep([0, 1, 2])
+    idx, _r, _v, _ts, err = worker.results.get(timeout=2)
+    assert idx == 0 and isinstance(err, RuntimeError)
+
+
+def test_lost_reply_is_asked_again():
+    class LosesFirst(ScriptedScanner):
+        lost = 0
+
+        def _handle(self, cmd):
+            if cmd.upper().startswith(b"FETC") and not self.lost:
+                self.lost = 1                # คำตอบแรกหายระหว่างทาง
+                self.commands.append(cmd)
+                return
+            super()._handle(cmd)
+
+    sim = LosesFirst(seed=2)
+    session = SerialSession("sim://scanner", 9600, lambda p, b: sim)
+    session.open()
+    worker = MeterWorker(session, stream=True)
+    worker.start()
+    try:
+        worker.request(3)
+        idx, _r, _v, _ts, err = worker.results.get(timeout=2)
+        assert (idx, err) == (3, None) and _fetches(sim) == 2
+    finally:
+        worker.stop()
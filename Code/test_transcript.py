@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for transcript: .mrvt record -> read_transcript / ReplaySerial round trip
+
+Run from the Code folder:  python -m pytest -q
+"""
+
+import math
+
+import pytest
+
+from meter_io import read_fetc
+from scanner_sim import ScriptedScanner
+from transcript import TranscriptWriter, RecordingSerial, ReplaySerial, read_transcript, replay_readings, RX
+
+
+class _Bench(ScriptedScanner):
+    """channel 3 ไม่ตอบ (timeout), channel 4 ตอบ nan"""
+    def _handle(self, cmd):
+        if self.channel == 3 and cmd.upper().startswith(b"FETC"):
+            self.commands.append(cmd)
+            return
+        super()._handle(cmd)
+
+    def _reading(self, ch):
+        return b"+NAN,+5.0E+00,+0" if ch == 4 else super()._reading(ch)
+
+
+def _outcome(fn, ser):
+    try:
+        return fn(ser)
+    except Exception as e:
+        return type(e)
+
+
+def test_transcript_round_trip(tmp_path):
+    path = str(tmp_path / "run.mrvt")
+    w = TranscriptWriter(path, "sim://scanner")
+    ser = RecordingSerial(_Bench(seed=5), w)
+    live = []
+    for ch in range(1, 7):
+        ser.write(b":ROUT:CLOS (@%d)\r\n" % ch)
+        live.append(_outcome(read_fetc, ser))
+    ser.close()
+    w.close()
+    assert live[2] is TimeoutError and live[3] is ValueError
+
+    kinds = [k for _t, k, _d in read_transcript(path)]
+    assert kinds[:2] == ["#", "#"] and kinds[-1] == "#" and kinds.count("<") == 6
+
+    rep = ReplaySerial(path)
+    assert len(rep) == 6
+    replayed = [r if e is None else type(e) for r, _v, e in replay_readings(rep, read_fetc)]
+    assert replayed == [x if isinstance(x, type) else x[0] for x in live]
+    assert rep.remaining == 0
+    with pytest.raises(EOFError):
+        rep.readline()
+
+
+def test_transcript_long_payload_and_bad_file(tmp_path):
+    path = str(tmp_path / "big.mrvt")
+    w = TranscriptWriter(path)
+    blob = bytes(range(256)) * 300               # > 65535 bytes: ต้องต่อหลาย record
+    w.record(RX, blob)
+    w.record(RX, b"")
+    w.close()
+    assert [d for _t, _k, d in read_transcript(path)] == [blob, b""]
+
+    other = tmp_path / "not.mrvt"
+    other.write_bytes(b"hello")
+    with pytest.raises(ValueError):
+        list(read_transcript(str(other)))
+
+
+def test_transcript_timestamps_increase(tmp_path):
+    path = str(tmp_path / "t.mrvt")
+    w = TranscriptWriter(path, "COM3")
+    for k in range(5):
+        w.record(RX, b"%d" % k)
+    w.close()
+    ts = [t for t, _k, _d in read_transcript(path)]
+    assert all(b >= a for a, b in zip(ts, ts[1:])) and math.isfinite(ts[0])
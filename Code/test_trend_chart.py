@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for trend_chart.TrendRing / decimate(): ring wraparound vs brute-force min/max
+
+Run from the Code folder:  python -m pytest -q
+"""
+
+import random
+
+import pytest
+
+from trend_chart import TrendRing, decimate
+
+
+def _expected_columns(ring, hist, columns):
+    """brute force: ค่าใน window = ค่าล่าสุด n ตัว; column ตามการแบ่งเดียวกับ decimate()"""
+    blk = max([lv[0] for lv in ring.levels if lv[0] * columns <= ring.count], default=1)
+    _start, n = ring.window(blk)
+    vals = hist[-n:]
+    cols = [None] * columns
+    for k, x in enumerate(vals):
+        c = (k // blk) * blk * columns // n
+        cols[c] = [x, x] if cols[c] is None else [min(cols[c][0], x), max(cols[c][1], x)]
+    return cols
+
+
+@pytest.mark.parametrize("appended", [0, 1, 7, 8, 9, 63, 64, 65, 511, 512, 513, 700, 1024, 1500, 1537])
+def test_ring_decimate_matches_brute_force(appended):
+    ring = TrendRing(capacity=512, blocks=(8, 64))
+    rnd = random.Random(appended)
+    hr, hv = [], []
+    for _ in range(appended):
+        r, v = rnd.uniform(9, 11), rnd.uniform(4.9, 5.1)
+        ring.append(r, v)
+        hr.append(r); hv.append(v)
+    assert ring.count == min(appended, 512) and ring.total == appended
+    for columns in (1, 3, 7, 8, 50, 64, 100, 600):
+        assert decimate(ring, "r", columns) == _expected_columns(ring, hr, columns)
+        assert decimate(ring, "v", columns) == _expected_columns(ring, hv, columns)
+
+
+def test_ring_clear():
+    ring = TrendRing(capacity=64, blocks=(8,))
+    for k in range(100):
+        ring.append(k, -k)
+    ring.clear()
+    assert decimate(ring, "r", 10) == [None] * 10
+    ring.append(1.0, 2.0)
+    assert decimate(ring, "v", 1) == [[2.0, 2.0]]
+
+
+def test_ring_capacity_must_fit_blocks():
+    with pytest.raises(ValueError):
+        TrendRing(capacity=100, blocks=(8,))
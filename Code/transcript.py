@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Serial transcript: record every byte exchanged with a meter, replay it at full speed
+- RecordingSerial wraps any pyserial-like port; each write() and each read call's
+  result (including empty/partial reads = timeouts) becomes one timestamped record
+- Compact binary log (.mrvt): 7-byte record header + payload, no text formatting
+  on the hot path; one file per port, lives across reconnects
+- ReplaySerial hands the recorded read results back call by call, without waiting,
+  so read_fetc / _read_meter see exactly the field traffic (timeouts included)
+
+File layout:
+  b"MRVT\\x01" + records
+  record = <I dt_us since previous record> <B kind> <H length> + payload
+  kind: '>' host->meter, '<' meter->host (one read call), '#' note (port, open, close),
+        '@' clock sync (payload <d epoch seconds>); kind | 0x80 = payload continues
+
+Usage:  python transcript.py info FILE.mrvt
+        python transcript.py replay FILE.mrvt      (parse throughput, no GUI)
+"""
+
+import struct, sys, threading, time
+
+MAGIC = b"MRVT\x01"
+_HDR = struct.Struct("<IBH")
+_MAX_DT_US = 0xFFFFFFFF
+_MAX_LEN = 0xFFFF
+_CONT = 0x80
+
+TX, RX, NOTE, SYNC = ord(">"), ord("<"), ord("#"), ord("@")
+FLUSH_EVERY_S = 1.0
+
+
+class TranscriptWriter:
+    """Append-only .mrvt writer (thread-safe; buffered, flushed about once a second)"""
+
+    def __init__(self, path, port=""):
+        self.path = path
+        self._f = open(path, "wb", buffering=64 * 1024)
+        self._lock = threading.Lock()
+        self._f.write(MAGIC)
+        self._last = time.perf_counter()
+        self._last_flush = self._last
+        self.n_records = 0
+        self._write(SYNC, struct.pack("<d", time.time()), self._last)
+        if port:
+            self.note(f"port {port}")
+
+    def record(self, kind, data):
+        with self._lock:
+            if self._f is None:
+                return
+            now = time.perf_counter()
+            if now - self._last > _MAX_DT_US / 1e6:    # ช่องว่างนานเกิน uint32 µs → ใส่เวลาจริงใหม่
+                self._write(SYNC, struct.pack("<d", time.time()), now)
+            self._write(kind, bytes(data), now)
+            if now - self._last_flush >= FLUSH_EVERY_S:
+                self._f.flush()
+                self._last_flush = now
+
+    def note(self, text):
+        self.record(NOTE, text.encode("utf-8"))
+
+    def _write(self, kind, data, now):
+        dt = min(int((now - self._last) * 1e6), _MAX_DT_US)
+        self._last = now
+        while len(data) > _MAX_LEN:
+            self._f.write(_HDR.pack(dt, kind | _CONT, _MAX_LEN)); self._f.write(data[:_MAX_LEN])
+            data, dt = data[_MAX_LEN:], 0
+        self._f.write(_HDR.pack(dt, kind, len(data))); self._f.write(data)
+        self.n_records += 1
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+
+def read_transcript(path):
+    """.mrvt -> iterator of (epoch_seconds, kind_char, payload)"""
+    with open(path, "rb") as f:
+        buf = f.read()
+    if not buf.startswith(MAGIC):
+        raise ValueError(f"Not a transcript file: {path}")
+    pos, t, part = len(MAGIC), 0.0, b""
+    n = len(buf)
+    while pos + _HDR.size <= n:
+        dt, kind, ln = _HDR.unpack_from(buf, pos)
+        pos += _HDR.size
+        data = buf[pos:pos + ln]; pos += ln
+        t += dt / 1e6
+        if kind & _CONT:
+            part += data
+            continue
+        data, part = part + data, b""
+        if kind == SYNC:
+            t = struct.unpack("<d", data)[0]
+            continue
+        yield t, chr(kind), data
+
+
+class RecordingSerial:
+    """Port wrapper: passes everything through to `ser` and logs traffic to `writer`"""
+
+    def __init__(self, ser, writer):
+        object.__setattr__(self, "_ser", ser)
+        object.__setattr__(self, "_w", writer)
+        writer.note("open")
+
+    def write(self, data):
+        self._w.record(TX, data)
+        return self._ser.write(data)
+
+    def read(self, size=1):
+        data = self._ser.read(size)
+        self._w.record(RX, data)
+        return data
+
+    def readline(self, *a):
+        data = self._ser.readline(*a)
+        self._w.record(RX, data)
+        return data
+
+    def read_until(self, *a, **kw):
+        data = self._ser.read_until(*a, **kw)
+        self._w.record(RX, data)
+        return data
+
+    def close(self):
+        self._w.note("close")
+        self._ser.close()
+
+    # timeout, is_open, reset_input_buffer, flush ... ส่งต่อไปที่พอร์ตจริง
+    def __getattr__(self, name):
+        return getattr(self._ser, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._ser, name, value)
+
+
+class ReplaySerial:
+    """
+    pyserial-like port that returns the recorded read results in order, instantly.
+    write() is accepted and counted; EOFError when the transcript runs out.
+    """
+
+    def __init__(self, path):
+        self.port = f"replay://{path}"
+        self.is_open = True
+        self.timeout = 1
+        self.baudrate = 9600
+        self._rx = [d for _t, k, d in read_transcript(path) if k == "<"]
+        self._pos = 0
+        self.n_writes = 0
+
+    def __len__(self):
+        return len(self._rx)
+
+    @property
+    def remaining(self):
+        return len(self._rx) - self._pos
+
+    def _next(self):
+        if self._pos >= len(self._rx):
+            raise EOFError("End of transcript")
+        data = self._rx[self._pos]
+        self._pos += 1
+        return data
+
+    def write(self, data):
+        self.n_writes += 1
+        return len(data)
+
+    def read(self, size=1): return self._next()
+    def readline(self, *a): return self._next()
+    def read_until(self, *a, **kw): return self._next()
+    def flush(self): pass
+    def reset_input_buffer(self): pass
+    def reset_output_buffer(self): pass
+    def close(self): self.is_open = False
+
+
+def replay_readings(ser, read_fn):
+    """อ่านซ้ำจนหมด transcript -> iterator of (r, v, err)"""
+    while True:
+        try:
+            r, v = read_fn(ser)
+        except EOFError:
+            return
+        except Exception as e:
+            yield None, None, e
+            continue
+        yield r, v, None
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] not in ("info", "replay"):
+        print(__doc__.strip().split("Usage:")[1]); return 2
+    cmd, path = sys.argv[1:]
+    if cmd == "info":
+        recs = list(read_transcript(path))
+        by_kind = {}
+        for _t, k, d in recs:
+            n, b = by_kind.get(k, (0, 0)); by_kind[k] = (n + 1, b + len(d))
+        if recs:
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(recs[0][0]))}  "
+                  f"span {recs[-1][0] - recs[0][0]:.3f} s")
+        for k, (n, b) in sorted(by_kind.items()):
+            print(f"  {k}  {n:8d} records  {b:10d} bytes")
+        for _t, k, d in recs:
+            if k == "#":
+                print("  #", d.decode("utf-8", "replace"))
+        return 0
+
+    from meter_io import read_fetc
+    ser = ReplaySerial(path)
+    ok = err = 0
+    t0 = time.perf_counter()
+    for _r, _v, e in replay_readings(ser, read_fetc):
+        if e is None: ok += 1
+        else: err += 1
+    dt = time.perf_counter() - t0
+    print(f"{ok} readings, {err} errors in {dt*1000:.1f} ms "
+          f"({(ok + err) / dt if dt else 0:,.0f} reads/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Live R/V trend chart for the Main tab
+- TrendRing: preallocated ring of the last CAPACITY readings (array('d'));
+  append() is O(1) and memory does not grow during a shift.  Blocks of 8 / 64 /
+  512 slots also keep a running min/max, updated on append
+- decimate(): min/max per pixel column, from the raw ring or from the coarsest
+  block level that still gives one block per column, so a redraw scans at most
+  ~8 values per column whatever the history length
+- TrendChart: Canvas with an R panel and a V panel; limit band + one min/max
+  polyline per panel.  Items are created once and only moved (coords) on
+  redraw / <Configure>
+"""
+
+import math
+from array import array
+import tkinter as tk
+
+CAPACITY = 1 << 16      # readings ที่เก็บไว้ (เกินนี้ทับค่าเก่าสุด)
+BLOCKS = (8, 64, 512)   # ขนาด block ของ min/max ล่วงหน้าแต่ละชั้น (CAPACITY ต้องหารลงตัว)
+
+COLOR_BAND = "#D1F2EB"
+COLOR_R = "#2E86C1"
+COLOR_V = "#AF601A"
+COLOR_AXIS = "#B6D9F2"
+COLOR_LABEL = "#6C7A89"
+PAD = 6
+
+
+class TrendRing:
+    def __init__(self, capacity=CAPACITY, blocks=BLOCKS):
+        if any(capacity % b for b in blocks):
+            raise ValueError("capacity must be a multiple of every block size")
+        self.capacity = capacity
+        self.r = array("d", bytes(8 * capacity))
+        self.v = array("d", bytes(8 * capacity))
+        # ต่อ level: (block, r_lo, r_hi, v_lo, v_hi)
+        self.levels = [(b,) + tuple(array("d", bytes(8 * (capacity // b))) for _ in range(4))
+                       for b in blocks]
+        self.head = 0     # ช่องถัดไปที่จะเขียน
+        self.count = 0    # จำนวนที่เก็บอยู่ (<= capacity)
+        self.total = 0    # จำนวนทั้งหมดตั้งแต่ clear()
+
+    def append(self, r, v):
+        h = self.head
+        self.r[h] = r
+        self.v[h] = v
+        for blk, r_lo, r_hi, v_lo, v_hi in self.levels:
+            b = h // blk
+            if h % blk == 0:      # เริ่ม block ใหม่ (ทับของเก่า)
+                r_lo[b] = r_hi[b] = r
+                v_lo[b] = v_hi[b] = v
+            else:
+                if r < r_lo[b]: r_lo[b] = r
+                if r > r_hi[b]: r_hi[b] = r
+                if v < v_lo[b]: v_lo[b] = v
+                if v > v_hi[b]: v_hi[b] = v
+        self.head = (h + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def clear(self):
+        self.head = self.count = self.total = 0
+
+    def window(self, blk=1):
+        """(start, n) ของช่วงที่แสดง -- พอ ring เต็ม เริ่มที่ขอบ block ถัดจาก head
+        (block ที่ head กำลังเขียนทับ min/max เป็นของค่าใหม่แล้ว)"""
+        if self.count < self.capacity:
+            return 0, self.count
+        start = -(-self.head // blk) * blk % self.capacity
+        return start, self.capacity - (start - self.head) % self.capacity
+
+
+def decimate(ring, which, columns):
+    """[(lo, hi) หรือ None] ต่อ column สำหรับ which = "r" / "v"
+    ใช้ block ใหญ่สุดที่ยังได้อย่างน้อย 1 block ต่อ column -> สแกนไม่เกิน ~8 ค่าต่อ column"""
+    cols = [None] * columns
+    if ring.count == 0 or columns <= 0:
+        return cols
+    cap = ring.capacity
+    level = None
+    for lv in ring.levels:
+        if lv[0] * columns <= ring.count:
+            level = lv
+    if level is None:
+        start, n = ring.window()
+        buf = ring.r if which == "r" else ring.v
+        for k in range(n):
+            x = buf[(start + k) % cap]
+            c = k * columns // n
+            cur = cols[c]
+            if cur is None:
+                cols[c] = [x, x]
+            elif x < cur[0]:
+                cur[0] = x
+            elif x > cur[1]:
+                cur[1] = x
+    else:
+        blk = level[0]
+        lo, hi = (level[1], level[2]) if which == "r" else (level[3], level[4])
+        start, n = ring.window(blk)
+        b0, nb = start // blk, -(-n // blk)
+        total_b = cap // blk
+        for j in range(nb):
+            b = (b0 + j) % total_b
+            c = j * blk * columns // n
+            cur = cols[c]
+            if cur is None:
+                cols[c] = [lo[b], hi[b]]
+            else:
+                if lo[b] < cur[0]: cur[0] = lo[b]
+                if hi[b] > cur[1]: cur[1] = hi[b]
+    return cols
+
+
+class TrendChart(tk.Canvas):
+    """bounds() คืน ((rmin, rmax), (vmin, vmax)) ของ limit ปัจจุบัน"""
+
+    def __init__(self, parent, ring, bounds, **kw):
+        kw.setdefault("height", 160)
+        kw.setdefault("bg", "#FFFFFF")
+        kw.setdefault("highlightthickness", 1)
+        super().__init__(parent, **kw)
+        self.ring = ring
+        self.bounds = bounds
+        self._panels = []
+        for name, unit, color in (("r", "R (mΩ)", COLOR_R), ("v", "V (V)", COLOR_V)):
+            self._panels.append({
+                "name": name,
+                "frame": self.create_rectangle(0, 0, 0, 0, outline=COLOR_AXIS),
+                "band": self.create_rectangle(0, 0, 0, 0, fill=COLOR_BAND, width=0),
+                "line": self.create_line(0, 0, 0, 0, fill=color, width=1, state="hidden"),
+                "label": self.create_text(0, 0, text=unit, anchor="nw", fill=COLOR_LABEL,
+                                          font=("Segoe UI", 8)),
+                "range": self.create_text(0, 0, text="", anchor="ne", fill=COLOR_LABEL,
+                                          font=("Segoe UI", 8)),
+            })
+        self._count_text = self.create_text(0, 0, text="", anchor="se", fill=COLOR_LABEL,
+                                            font=("Segoe UI", 8))
+        self.bind("<Configure>", lambda _e: self.redraw())
+
+    def redraw(self):
+        w = self.winfo_width() or int(self["width"])
+        h = self.winfo_height() or int(self["height"])
+        try:
+            limits = self.bounds()
+        except Exception:     # ช่อง Set/Tol ยังพิมพ์ไม่ครบ
+            limits = (None, None)
+        columns = max(1, w - 2 * PAD)
+        ph = (h - 3 * PAD) / 2.0
+        for i, (p, lim) in enumerate(zip(self._panels, limits)):
+            top = PAD + i * (ph + PAD)
+            self._draw_panel(p, lim, PAD, top, columns, ph)
+        self.coords(self._count_text, w - PAD, h - 1)
+        self.itemconfigure(self._count_text, text=f"{self.ring.total} readings")
+
+    def _draw_panel(self, p, lim, x0, top, columns, ph):
+        bottom = top + ph
+        self.coords(p["frame"], x0, top, x0 + columns, bottom)
+        self.coords(p["label"], x0 + 3, top + 2)
+        cols = decimate(self.ring, p["name"], columns)
+        used = [c for c in cols if c is not None]
+        lo = min((c[0] for c in used), default=None)
+        hi = max((c[1] for c in used), default=None)
+        if lim is not None:
+            lo = lim[0] if lo is None else min(lo, lim[0])
+            hi = lim[1] if hi is None else max(hi, lim[1])
+        if lo is None or not (math.isfinite(lo) and math.isfinite(hi)):
+            self.itemconfigure(p["line"], state="hidden")
+            self.coords(p["band"], 0, 0, 0, 0)
+            self.itemconfigure(p["range"], text="")
+            return
+        span = (hi - lo) or abs(hi) or 1.0
+        lo -= span * 0.08
+        hi += span * 0.08
+        k = ph / (hi - lo)
+
+        def y(val):
+            return bottom - (val - lo) * k
+
+        if lim is not None:
+            self.coords(p["band"], x0, y(lim[1]), x0 + columns, y(lim[0]))
+        else:
+            self.coords(p["band"], 0, 0, 0, 0)
+        self.coords(p["range"], x0 + columns - 3, top + 2)
+        self.itemconfigure(p["range"], text=f"{lo:.4g} .. {hi:.4g}")
+
+        # polyline แบบ min/max: ลากขึ้นลงในแต่ละ column
+        pts = []
+        for c, mm in enumerate(cols):
+            if mm is not None:
+                x = x0 + c
+                pts.extend((x, y(mm[0]), x, y(mm[1])))
+        if len(pts) < 4:
+            self.itemconfigure(p["line"], state="hidden")
+            return
+        self.coords(p["line"], *pts)
+        self.itemconfigure(p["line"], state="normal")